@@ -0,0 +1,115 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+from foodgram.constant import RECIPE_CACHE_PREFIX, RECIPE_GENERATION_TIMEOUT
+
+LIST_GENERATION_KEY = f'{RECIPE_CACHE_PREFIX}:generation:list'
+CATALOGUE_GENERATION_KEY = f'{RECIPE_CACHE_PREFIX}:generation:catalogue'
+HITS_KEY = f'{RECIPE_CACHE_PREFIX}:stats:hits'
+MISSES_KEY = f'{RECIPE_CACHE_PREFIX}:stats:misses'
+
+
+def get_generation(key):
+    """Текущее поколение кэша.
+
+    Начальное значение берётся от времени, чтобы после вытеснения ключа
+    из кэша не вернуться к поколению, под которым ещё лежат старые ответы.
+    """
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def bump_generation(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def normalize_params(query_params):
+    return urlencode(sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        for value in values
+    ))
+
+
+def digest(*parts):
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def recipe_list_key(query_params, origin):
+    """Ключ списка Рецептов.
+
+    В ответе лежат абсолютные ссылки, поэтому ключ зависит и от адреса,
+    по которому пришёл запрос.
+    """
+    params = digest(origin, normalize_params(query_params))
+    return (
+        f'{RECIPE_CACHE_PREFIX}:list:'
+        f'{get_generation(LIST_GENERATION_KEY)}:'
+        f'{get_generation(CATALOGUE_GENERATION_KEY)}:{params}'
+    )
+
+
+def recipe_generation_key(pk):
+    return f'{RECIPE_CACHE_PREFIX}:generation:detail:{pk}'
+
+
+def recipe_detail_key(pk, origin):
+    """Ключ страницы Рецепта.
+
+    Поколение Рецепта только читается: ключ поколения появляется при
+    сбросе и живёт дольше страницы, поэтому запросы к произвольным
+    идентификаторам не оставляют в кэше вечных ключей.
+    """
+    return (
+        f'{RECIPE_CACHE_PREFIX}:detail:{pk}:'
+        f'{cache.get(recipe_generation_key(pk), 0)}:'
+        f'{get_generation(CATALOGUE_GENERATION_KEY)}:{digest(origin)}'
+    )
+
+
+def invalidate_recipes(recipe_ids):
+    """Сбросить списки Рецептов и страницы переданных Рецептов.
+
+    Страницы Рецептов кэшируются отдельно для каждого адреса, поэтому
+    меняется поколение Рецепта, а не удаляются сами ключи.
+    """
+
+    keys = [recipe_generation_key(pk) for pk in recipe_ids]
+    if not keys:
+        return
+    bump_generation(LIST_GENERATION_KEY)
+    generation = time.time_ns()
+    cache.set_many(
+        {key: generation for key in keys}, RECIPE_GENERATION_TIMEOUT
+    )
+
+
+def invalidate_catalogue():
+    """Сбросить все ответы после изменения Тэгов или Ингредиентов."""
+
+    bump_generation(CATALOGUE_GENERATION_KEY)
+
+
+def record(hit):
+    increment(HITS_KEY if hit else MISSES_KEY)
+
+
+def get_stats():
+    stats = cache.get_many((HITS_KEY, MISSES_KEY))
+    return {
+        'hits': stats.get(HITS_KEY, 0),
+        'misses': stats.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,109 @@
+"""Лента Рецептов авторов, на которых подписан Пользователь.
+
+В PostgreSQL лента собирается слиянием отсортированных потоков Рецептов
+каждого автора через LATERAL: каждый поток читается по индексу
+(author, -pub_date), поэтому на страницу уходит не больше limit строк на
+автора независимо от общего числа его Рецептов. На остальных СУБД лента
+строится одним запросом с ROW_NUMBER() по автору (SQLite >= 3.25).
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from recipes.models import Recipe
+from foodgram.constant import (FEED_CACHE_PREFIX, FEED_CACHE_SIZE,
+                               FEED_CACHE_TIMEOUT)
+
+POSTGRES_FEED = (
+    'SELECT r.pub_date, r.id FROM users_subscribe s '
+    'CROSS JOIN LATERAL ('
+    'SELECT pub_date, id FROM recipes_recipe '
+    'WHERE author_id = s.author_id {before} '
+    'ORDER BY pub_date DESC, id DESC LIMIT %s'
+    ') r '
+    'WHERE s.user_id = %s '
+    'ORDER BY r.pub_date DESC, r.id DESC LIMIT %s'
+)
+
+
+def encode_cursor(position):
+    pub_date, pk = position
+    return urlsafe_b64encode(
+        f'{pub_date.isoformat()}|{pk}'.encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    """Позиция (pub_date, id) из курсора или ValueError."""
+
+    try:
+        pub_date, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (TypeError, UnicodeDecodeError, ValueError) as error:
+        raise ValueError('Некорректный курсор.') from error
+
+
+def merge_feed(user, before, limit):
+    """Первые limit позиций ленты после позиции before."""
+
+    if connection.vendor == 'postgresql':
+        condition, params = '', []
+        if before is not None:
+            condition, params = 'AND (pub_date, id) < (%s, %s)', list(before)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                POSTGRES_FEED.format(before=condition),
+                (*params, limit, user.pk, limit),
+            )
+            return cursor.fetchall()
+    queryset = Recipe.objects.filter(author__following__user=user)
+    if before is not None:
+        queryset = queryset.filter(
+            Q(pub_date__lt=before[0])
+            | Q(pub_date=before[0], id__lt=before[1])
+        )
+    return list(queryset.annotate(
+        author_row=Window(
+            RowNumber(),
+            partition_by=F('author'),
+            order_by=(F('pub_date').desc(), F('id').desc()),
+        )
+    ).filter(author_row__lte=limit).order_by(
+        '-pub_date', '-id'
+    ).values_list('pub_date', 'id')[:limit])
+
+
+def feed_key(user_id):
+    return f'{FEED_CACHE_PREFIX}:{user_id}'
+
+
+def invalidate_feed(user_id):
+    cache.delete(feed_key(user_id))
+
+
+def get_feed(user, before, limit):
+    """Позиции (pub_date, id) страницы ленты.
+
+    Начало ленты длиной FEED_CACHE_SIZE хранится в кэше, более дальние
+    страницы собираются слиянием заново.
+    """
+
+    head = cache.get(feed_key(user.pk))
+    if head is None:
+        head = merge_feed(user, None, FEED_CACHE_SIZE)
+        cache.set(feed_key(user.pk), head, FEED_CACHE_TIMEOUT)
+    start = 0
+    if before is not None:
+        start = next(
+            (index for index, position in enumerate(head)
+             if position < before),
+            len(head),
+        )
+    page = head[start:start + limit]
+    if len(page) == limit or len(head) < FEED_CACHE_SIZE:
+        return page
+    return merge_feed(user, before, limit)
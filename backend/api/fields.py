@@ -0,0 +1,125 @@
+import base64
+import binascii
+import uuid
+from tempfile import SpooledTemporaryFile
+
+import filetype
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from rest_framework import serializers
+
+from recipes.storage import recipe_storage
+from foodgram.constant import (IMAGE_DECODE_CHUNK_SIZE, IMAGE_SPOOL_SIZE,
+                               MAX_IMAGE_SIZE)
+
+
+def resolve_primary_keys(queryset, pks):
+    """Получить объекты по списку id одним запросом.
+
+    Все отсутствующие id попадают в одну ошибку валидации.
+    """
+    try:
+        pks = [int(pk) for pk in pks]
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(
+            'Идентификаторы должны быть целыми числами.'
+        )
+    objects = queryset.in_bulk(pks)
+    missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            f'Не найдены объекты с id: {", ".join(map(str, missing))}.'
+        )
+    return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, проверяемый одним запросом id__in."""
+
+    def __init__(self, queryset, **kwargs):
+        super().__init__(
+            child_relation=serializers.PrimaryKeyRelatedField(
+                queryset=queryset
+            ),
+            **kwargs
+        )
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return resolve_primary_keys(self.child_relation.get_queryset(), data)
+
+
+class RecipeImageField(Base64ImageField):
+    """Изображение в base64 с ограничением размера.
+
+    Размер проверяется до декодирования, а сама строка декодируется
+    частями во временный файл, который уходит на диск после
+    IMAGE_SPOOL_SIZE байт.
+    """
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        content_type = None
+        if ';base64,' in base64_data:
+            header, base64_data = base64_data.split(';base64,', 1)
+            content_type = header.replace('data:', '')
+        base64_data = ''.join(base64_data.split())
+        if len(base64_data) * 3 // 4 > MAX_IMAGE_SIZE:
+            raise serializers.ValidationError(
+                f'Размер изображения не должен превышать '
+                f'{MAX_IMAGE_SIZE // (1024 * 1024)} МБ.'
+            )
+        file = SpooledTemporaryFile(max_size=IMAGE_SPOOL_SIZE)
+        try:
+            for start in range(0, len(base64_data), IMAGE_DECODE_CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    base64_data[start:start + IMAGE_DECODE_CHUNK_SIZE],
+                    validate=True,
+                ))
+        except (TypeError, binascii.Error, ValueError):
+            file.close()
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        size = file.tell()
+        file.seek(0)
+        extension = filetype.guess_extension(file.read(261))
+        file.seek(0)
+        extension = 'jpg' if extension == 'jpeg' else extension
+        if extension not in self.ALLOWED_TYPES:
+            file.close()
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        return super(Base64FieldMixin, self).to_internal_value(UploadedFile(
+            file=file,
+            name=f'{uuid.uuid4()}.{extension}',
+            content_type=content_type,
+            size=size,
+        ))
+
+
+class ImageVariantField(serializers.Field):
+    """Ссылка на вариант изображения Рецепта.
+
+    Пока вариант не построен, возвращается исходное изображение.
+    """
+
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        name = (recipe.image_variants or {}).get(self.variant)
+        if name:
+            url = recipe_storage.url(name)
+        elif recipe.image:
+            url = recipe.image.url
+        else:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
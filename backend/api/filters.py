@@ -1,5 +1,6 @@
 import django_filters as filters
 
+from recipes.fulltext import search_recipes
 from recipes.models import Ingredient, Recipe
 
 
@@ -29,6 +30,10 @@ class RecipeFilter(filters.FilterSet):
         field_name='tags__slug',
         label='Ссылка',
     )
+    search = filters.CharFilter(
+        method='filter_search',
+        label='Поиск по названию, описанию и ингредиентам.',
+    )
 
     class Meta:
         model = Recipe
@@ -37,4 +42,8 @@ class RecipeFilter(filters.FilterSet):
             'is_in_shopping_cart',
             'author',
             'tags',
+            'search',
         )
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value.strip())
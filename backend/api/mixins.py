@@ -0,0 +1,106 @@
+from calendar import timegm
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from recipes.models import CatalogueVersion
+from foodgram.constant import CATALOGUE_CACHE_CONTROL, RECIPE_CACHE_TIMEOUT
+from .cache import (invalidate_recipes, record, recipe_detail_key,
+                    recipe_list_key)
+
+
+class CatalogueCacheMixin:
+    """Условные GET-запросы к справочникам по версии справочника.
+
+    Ответ получает ETag и Last-Modified по версии справочника, а на
+    совпадающий условный запрос возвращается 304 без обращения к данным.
+    """
+
+    catalogue = None
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        self.catalogue_version, updated_at = (
+            CatalogueVersion.objects.get_version(self.catalogue)
+        )
+        etag = quote_etag(f'{self.catalogue}-{self.catalogue_version}')
+        last_modified = (
+            timegm(updated_at.utctimetuple()) if updated_at else None
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = CATALOGUE_CACHE_CONTROL
+        return response
+
+    def list_catalogue(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.list_catalogue, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+
+class AnonymousCacheMixin:
+    """Кэширование списка и страниц Рецептов для анонимных пользователей.
+
+    Ответы анонимам не зависят от пользователя, поэтому данные ответа
+    кэшируются по адресу и нормализованным параметрам запроса и сбрасываются
+    при изменении Рецептов, их авторов, Тэгов и Ингредиентов.
+    """
+
+    @staticmethod
+    def get_origin(request):
+        return request.build_absolute_uri('/')
+
+    def cached_response(self, request, key, handler, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        data = cache.get(key)
+        record(hit=data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, RECIPE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            recipe_list_key(request.query_params, self.get_origin(request)),
+            super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(
+            request,
+            recipe_detail_key(int(pk), self.get_origin(request)),
+            super().retrieve, *args, **kwargs
+        )
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_recipes((serializer.instance.pk,))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_recipes((serializer.instance.pk,))
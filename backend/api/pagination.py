@@ -1,5 +1,63 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class LimitCursorPagination(CursorPagination):
+    """Курсорная пагинация по полям из атрибута cursor_ordering вьюсета.
+
+    Общее количество объектов считается только по параметру count=true.
+    """
+
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    ordering = ('-pub_date', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in (
+            'true', '1'
+        ):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = OrderedDict(
+                count=self.count, **response.data
+            )
+        return response
+
+
+class OptionalCursorPagination(LimitPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    Курсорный режим включается параметром pagination=cursor
+    или наличием параметра cursor.
+    """
+
+    cursor_pagination_class = LimitCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if (request.query_params.get('pagination') == 'cursor'
+                or self.cursor_pagination_class.cursor_query_param
+                in request.query_params):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,139 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain, islice
+from threading import Lock
+
+from recipes.models import Ingredient
+from foodgram.constant import (INGREDIENT_SEARCH_CANDIDATES,
+                               TRIGRAM_SIMILARITY_THRESHOLD)
+
+
+def trigrams(value):
+    """Триграммы строки по правилам pg_trgm."""
+
+    result = set()
+    for word in value.split():
+        word = f'  {word} '
+        result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return result
+
+
+class IngredientSearchIndex:
+    """Индекс Ингредиентов в памяти процесса для автодополнения.
+
+    Хранит отсортированные названия для поиска по префиксу и
+    инвертированный индекс триграмм для поиска по подстроке и опечаткам.
+    Перестраивается, когда меняется версия справочника Ингредиентов,
+    поэтому изменения из других процессов тоже подхватываются.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._names = []
+        self._ingredients = {}
+        self._trigrams = {}
+
+    def _build(self, version):
+        ingredients = {}
+        names = []
+        postings = defaultdict(set)
+        for pk, name, measurement_unit in Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'
+        ).iterator():
+            lower_name = name.lower()
+            name_trigrams = trigrams(lower_name)
+            ingredients[pk] = (
+                name, measurement_unit, lower_name, len(name_trigrams)
+            )
+            names.append((lower_name, pk))
+            for trigram in name_trigrams:
+                postings[trigram].add(pk)
+        names.sort()
+        self._ingredients = ingredients
+        self._names = names
+        self._trigrams = dict(postings)
+        self._version = version
+
+    def _ensure_built(self, version):
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._build(version)
+
+    def _prefix(self, query):
+        names = self._names
+        for index in range(bisect_left(names, (query,)), len(names)):
+            lower_name, pk = names[index]
+            if not lower_name.startswith(query):
+                break
+            yield pk
+
+    def _substring(self, query, exclude, limit):
+        query_trigrams = trigrams(query)
+        # Триграммы с границей слова не годятся для поиска подстроки.
+        inner = sorted(
+            (self._trigrams.get(t, set()) for t in query_trigrams
+             if ' ' not in t),
+            key=len,
+        )
+        if not inner:
+            return []
+        candidates = inner[0].intersection(*inner[1:])
+        return heapq.nsmallest(
+            limit,
+            (pk for pk in candidates
+             if pk not in exclude and query in self._ingredients[pk][2]),
+            key=lambda pk: self._ingredients[pk][2],
+        )
+
+    def _similar(self, query, limit):
+        query_trigrams = trigrams(query)
+        # Сходство не больше доли общих триграмм запроса, поэтому
+        # названия с меньшим числом общих триграмм можно не оценивать.
+        required = TRIGRAM_SIMILARITY_THRESHOLD * len(query_trigrams)
+        overlaps = Counter(chain.from_iterable(
+            self._trigrams.get(t, ()) for t in query_trigrams
+        ))
+        candidates = heapq.nlargest(
+            INGREDIENT_SEARCH_CANDIDATES,
+            ((count, pk) for pk, count in overlaps.items()
+             if count >= required),
+        )
+        scored = []
+        for count, pk in candidates:
+            _, _, lower_name, trigrams_count = self._ingredients[pk]
+            similarity = count / (
+                len(query_trigrams) + trigrams_count - count
+            )
+            if similarity >= TRIGRAM_SIMILARITY_THRESHOLD:
+                scored.append((-similarity, lower_name, pk))
+        return [pk for *_, pk in heapq.nsmallest(limit, scored)]
+
+    def search(self, query, version, limit):
+        """Найти Ингредиенты: сначала по префиксу, затем по подстроке.
+
+        Если совпадений нет, возвращаются похожие по триграммам названия.
+        Поиск останавливается, как только набрано limit результатов.
+        """
+        self._ensure_built(version)
+        query = ' '.join(query.lower().split())
+        if not query:
+            return []
+        found = list(islice(self._prefix(query), limit))
+        if len(found) < limit:
+            found += self._substring(query, set(found), limit - len(found))
+        if not found:
+            found = self._similar(query, limit)
+        return [
+            Ingredient(
+                id=pk,
+                name=self._ingredients[pk][0],
+                measurement_unit=self._ingredients[pk][1],
+            )
+            for pk in found
+        ]
+
+
+ingredient_index = IngredientSearchIndex()
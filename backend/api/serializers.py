@@ -1,13 +1,22 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField
 
+from recipes.fulltext import refresh_recipe_search
+from recipes.images import schedule_image_variants
+from recipes.storage import recipe_storage, release_recipe_image
 from recipes.models import (Ingredient, Recipe, RecipeIngredient,
-                            Tag, FavoriteRecipe, ShoppingCart)
+                            Tag, FavoriteRecipe, ShoppingCart,
+                            ShoppingCartIngredient, IngredientStat,
+                            RecipeWeekStat, AuthorStat)
 from users.models import Subscribe, User
+from .fields import (BulkPrimaryKeyRelatedField, ImageVariantField,
+                     RecipeImageField, resolve_primary_keys)
 from foodgram.constant import (MIN_VALUE_TIME, MAX_VALUE_TIME,
-                               MAX_VALUE_AMOUNT, MIN_VALUE_AMOUNT)
+                               MAX_VALUE_AMOUNT, MIN_VALUE_AMOUNT,
+                               MAX_BULK_RECIPES, MAX_COVERAGE_INGREDIENTS)
 
 
 class CustomUserSerializer(UserSerializer):
@@ -35,6 +44,8 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         return (user.is_authenticated
                 and user.follower.filter(author=obj).exists())
@@ -53,7 +64,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = '__all__'
+        fields = ('id', 'name', 'measurement_unit')
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
@@ -71,12 +82,23 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class IngredientsEditListSerializer(serializers.ListSerializer):
+    """Проверка всех выбранных Ингредиентов одним запросом."""
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients = resolve_primary_keys(
+            Ingredient.objects.all(), [item['id'] for item in items]
+        )
+        for item, ingredient in zip(items, ingredients):
+            item['id'] = ingredient
+        return items
+
+
 class IngredientsEditSerializer(serializers.ModelSerializer):
     """Сериализатор для выбора Ингредиентов."""
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-    )
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(
         min_value=MIN_VALUE_AMOUNT,
         max_value=MAX_VALUE_AMOUNT,
@@ -93,19 +115,19 @@ class IngredientsEditSerializer(serializers.ModelSerializer):
             'id',
             'amount',
         )
+        list_serializer_class = IngredientsEditListSerializer
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для Записи/Обновления Рецептов."""
 
-    image = Base64ImageField(
+    image = RecipeImageField(
         max_length=None,
         use_url=True,
         allow_null=False,
         allow_empty_file=False,
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all())
     ingredients = IngredientsEditSerializer(
         many=True)
@@ -165,15 +187,86 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data, author=user)
         recipe.tags.set(tags)
         self.create_ingredients(ingredients, recipe)
+        refresh_recipe_search((recipe.pk,))
+        schedule_image_variants(recipe)
         return recipe
 
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        """Обновить только изменившиеся ингредиенты Рецепта.
+
+        Возвращает идентификаторы ингредиентов, количество которых
+        изменилось.
+        """
+        amounts = {
+            item['id'].id: item['amount'] for item in ingredients
+        }
+        existing = {
+            item.ingredient_id: item for item in recipe.recipe.all()
+        }
+        removed = existing.keys() - amounts.keys()
+        changed = []
+        for ingredient_id, item in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        added = [
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        return removed | {item.ingredient_id for item in changed} | {
+            item.ingredient_id for item in added
+        }
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        self.create_ingredients(validated_data.pop('ingredients'), instance)
+        ingredients = self.update_ingredients(
+            validated_data.pop('ingredients'), instance
+        )
+        if ingredients:
+            ShoppingCartIngredient.objects.refresh(
+                ShoppingCart.objects.filter(recipe=instance).values('user'),
+                ingredients=ingredients,
+            )
         instance.tags.set(validated_data.pop('tags'))
-        return super().update(instance, validated_data)
+        old_image, old_variants = instance.image.name, instance.image_variants
+        if 'image' in validated_data:
+            validated_data['image_variants'] = {}
+        recipe = super().update(instance, validated_data)
+        refresh_recipe_search((recipe.pk,))
+        if recipe.image.name != old_image:
+            schedule_image_variants(recipe)
+            release_recipe_image(old_image, old_variants)
+        elif 'image' in validated_data:
+            # То же содержимое даёт то же имя файла: варианты остаются
+            # действительными.
+            recipe.image_variants = old_variants
+            recipe.save(update_fields=('image_variants',))
+        return recipe
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            (instance,),
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=RecipeIngredient.objects.select_related('ingredient'),
+            ),
+        )
         return RecipeReadSerializer(instance, context=self.context).data
 
 
@@ -181,6 +274,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     """Сериализатор для выгрузки Рецептов."""
 
     image = serializers.ImageField(use_url=True)
+    image_webp = ImageVariantField('webp')
+    thumbnail = ImageVariantField('thumbnail')
     tags = TagSerializer(
         many=True,
         read_only=True)
@@ -201,13 +296,88 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date',)
+        exclude = ('pub_date', 'image_variants', 'favorites_count',)
+
+
+class RecipeFastReadSerializer(serializers.BaseSerializer):
+    """Быстрая выгрузка Рецептов для списка и страницы Рецепта.
+
+    Отдаёт тот же JSON, что и RecipeReadSerializer, но собирает словари
+    напрямую из загруженных объектов, минуя поля DRF.
+    """
+
+    def build_url(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_image_urls(self, recipe):
+        name = recipe.image.name
+        if not name:
+            return None, None, None
+        image = self.build_url(recipe_storage.url(name))
+        variants = recipe.image_variants or {}
+        return image, *(
+            self.build_url(recipe_storage.url(variants[variant]))
+            if variants.get(variant) else image
+            for variant in ('webp', 'thumbnail')
+        )
+
+    def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
+        user = self.context['request'].user
+        return (user.is_authenticated
+                and user.follower.filter(author=author).exists())
+
+    def to_representation(self, recipe):
+        image, image_webp, thumbnail = self.get_image_urls(recipe)
+        author = recipe.author
+        return {
+            'id': recipe.id,
+            'image': image,
+            'image_webp': image_webp,
+            'thumbnail': thumbnail,
+            'tags': [
+                {
+                    'id': tag.id,
+                    'name': tag.name,
+                    'color': tag.color,
+                    'slug': tag.slug,
+                }
+                for tag in recipe.tags.all()
+            ],
+            'author': {
+                'email': author.email,
+                'id': author.id,
+                'username': author.username,
+                'first_name': author.first_name,
+                'last_name': author.last_name,
+                'is_subscribed': self.get_is_subscribed(author),
+            },
+            'ingredients': [
+                {
+                    'id': item.ingredient.id,
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipe.all()
+            ],
+            'is_favorited': bool(getattr(recipe, 'is_favorited', False)),
+            'is_in_shopping_cart': bool(
+                getattr(recipe, 'is_in_shopping_cart', False)
+            ),
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+        }
 
 
 class ObjectRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор представления(отображения) Избранного и Корзины."""
     image = serializers.ImageField(use_url=True,
                                    read_only=True)
+    thumbnail = ImageVariantField('thumbnail')
 
     class Meta:
         model = Recipe
@@ -215,6 +385,7 @@ class ObjectRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'thumbnail',
             'cooking_time',
         )
 
@@ -224,71 +395,161 @@ class FavoriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = FavoriteRecipe
         fields = ('user', 'recipe')
+        read_only_fields = ('user',)
 
-    def validate(self, data):
-        user, recipe = data.get('user'), data.get('recipe')
-        if self.Meta.model.objects.filter(user=user, recipe=recipe).exists():
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError(
                 {'error':
                  f'Рецепт уже добавлен в '
                  f'{self.Meta.model._meta.verbose_name}!'}
             )
-        return data
 
     def to_representation(self, instance):
         return ObjectRecipeSerializer(
             instance.recipe, context=self.context).data
 
 
+class BulkRecipesSerializer(serializers.Serializer):
+    """Сериализатор списка Рецептов для массового добавления/удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES,
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
+class CoverageSerializer(serializers.Serializer):
+    """Параметры подбора Рецептов по имеющимся Ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_COVERAGE_INGREDIENTS,
+    )
+    missing = serializers.IntegerField(min_value=0, default=0)
+
+    def to_internal_value(self, data):
+        ingredients = [
+            item
+            for value in data.getlist('ingredients')
+            for item in value.split(',') if item
+        ]
+        return super().to_internal_value({
+            'ingredients': ingredients,
+            'missing': data.get('missing', 0),
+        })
+
+    def validate_ingredients(self, value):
+        return list(dict.fromkeys(value))
+
+
 class ShoppingCartSerializer(FavoriteSerializer):
     """Сериализатор добавления/удаления рецепта в список покупок."""
     class Meta(FavoriteSerializer.Meta):
         model = ShoppingCart
 
+    def create(self, validated_data):
+        instance = super().create(validated_data)
+        ShoppingCartIngredient.objects.refresh(
+            (instance.user,), (instance.recipe,)
+        )
+        return instance
+
 
 class SubscriptionsSerializer(CustomUserSerializer):
     """Сериализатор для обработки подписок."""
     recipes = SerializerMethodField(read_only=True)
-    recipes_count = SerializerMethodField(read_only=True)
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta(CustomUserSerializer.Meta):
         fields = (
             CustomUserSerializer.Meta.fields + ('recipes', 'recipes_count')
         )
 
-    def get_recipes(self, obj):
-        request = self.context['request']
+    @staticmethod
+    def get_recipes_limit(request):
+        """Лимит Рецептов автора; отрицательный считается нулём."""
         try:
-            limit = int(request.GET.get('recipes_limit'))
+            return max(int(request.GET.get('recipes_limit')), 0)
         except (TypeError, ValueError):
-            limit = None
+            return None
 
-        recipes = obj.recipe.all()[:limit]
+    def get_recipes(self, obj):
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            limit = self.get_recipes_limit(self.context['request'])
+            recipes = obj.recipe.all()[:limit]
         return ObjectRecipeSerializer(
             recipes,
             many=True,
             context=self.context).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipe.count()
-
 
 class SubscribeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscribe
         fields = ('user', 'author',)
+        read_only_fields = ('user', 'author',)
 
-    def validate(self, data):
-        if data['user'] == data['author']:
+    def create(self, validated_data):
+        if validated_data['user'] == validated_data['author']:
             raise serializers.ValidationError(
                 'Нельзя подписаться на самого себя.'
             )
-        if Subscribe.objects.filter(
-            user=data['user'], author=data['author']
-        ).exists():
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError('Уже есть подписка.')
-        return data
 
     def to_representation(self, instance):
         return SubscriptionsSerializer(
             instance.author, context=self.context).data
+
+
+class IngredientStatSerializer(serializers.ModelSerializer):
+    """Сериализатор рейтинга Ингредиентов."""
+
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = IngredientStat
+        fields = ('rank', 'id', 'name', 'measurement_unit', 'recipes_count')
+
+
+class RecipeWeekStatSerializer(serializers.ModelSerializer):
+    """Сериализатор рейтинга Рецептов недели."""
+
+    recipe = ObjectRecipeSerializer(read_only=True)
+
+    class Meta:
+        model = RecipeWeekStat
+        fields = ('rank', 'week', 'favorites_count', 'recipe')
+
+
+class AuthorStatSerializer(serializers.ModelSerializer):
+    """Сериализатор рейтинга авторов."""
+
+    id = serializers.ReadOnlyField(source='author.id')
+    username = serializers.ReadOnlyField(source='author.username')
+    first_name = serializers.ReadOnlyField(source='author.first_name')
+    last_name = serializers.ReadOnlyField(source='author.last_name')
+
+    class Meta:
+        model = AuthorStat
+        fields = (
+            'rank', 'id', 'username', 'first_name', 'last_name',
+            'followers_count', 'recipes_count',
+        )
@@ -0,0 +1,117 @@
+import csv
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.pdfgen import canvas
+
+from recipes.models import ShoppingCartIngredient
+from foodgram.constant import (SHOPPING_LIST_TITLE, SHOPPING_LIST_CHUNK_SIZE,
+                               PDF_FONT_NAME, PDF_FONT_SIZE, PDF_LINE_HEIGHT,
+                               PDF_MARGIN, PDF_CHUNK_SIZE)
+
+logger = logging.getLogger(__name__)
+
+
+def get_shopping_list(user):
+    """Суммарные Ингредиенты из Корзины Пользователя."""
+
+    return ShoppingCartIngredient.objects.filter(
+        user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount'
+    ).order_by('ingredient__name').iterator(
+        chunk_size=SHOPPING_LIST_CHUNK_SIZE
+    )
+
+
+def format_line(num, item):
+    return (
+        f'{num}. {item["ingredient__name"]} - '
+        f'{item["amount"]} {item["ingredient__measurement_unit"]}'
+    )
+
+
+class Echo:
+    """Псевдо-буфер для построчной записи CSV."""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(ingredients):
+    """Построчная выгрузка Списка покупок в TXT."""
+
+    yield f'{SHOPPING_LIST_TITLE}\n\n'.encode()
+    for num, item in enumerate(ingredients, start=1):
+        yield f'{format_line(num, item)}\n'.encode()
+
+
+def export_csv(ingredients):
+    """Построчная выгрузка Списка покупок в CSV."""
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        ('Ингредиент', 'Количество', 'Единица измерения')
+    ).encode('utf-8-sig')
+    for item in ingredients:
+        yield writer.writerow((
+            item['ingredient__name'],
+            item['amount'],
+            item['ingredient__measurement_unit'],
+        )).encode()
+
+
+def get_pdf_font():
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    try:
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+        )
+    except TTFError:
+        logger.error(
+            'Шрифт %s для PDF не найден, кириллица не будет выведена. '
+            'Установите fonts-dejavu-core или задайте '
+            'SHOPPING_LIST_PDF_FONT.',
+            settings.SHOPPING_LIST_PDF_FONT,
+        )
+        return 'Helvetica'
+    return PDF_FONT_NAME
+
+
+def export_pdf(ingredients):
+    """Выгрузка Списка покупок в PDF.
+
+    Формат PDF требует таблицу ссылок в конце файла, поэтому документ
+    собирается целиком и отдаётся частями.
+    """
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    font = get_pdf_font()
+    _, height = A4
+    y = height - PDF_MARGIN
+    pdf.setFont(font, PDF_FONT_SIZE)
+    pdf.drawString(PDF_MARGIN, y, SHOPPING_LIST_TITLE)
+    y -= PDF_LINE_HEIGHT * 2
+    for num, item in enumerate(ingredients, start=1):
+        if y < PDF_MARGIN:
+            pdf.showPage()
+            pdf.setFont(font, PDF_FONT_SIZE)
+            y = height - PDF_MARGIN
+        pdf.drawString(PDF_MARGIN, y, format_line(num, item))
+        y -= PDF_LINE_HEIGHT
+    pdf.save()
+    buffer.seek(0)
+    yield from iter(lambda: buffer.read(PDF_CHUNK_SIZE), b'')
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (export_txt, 'text/plain; charset=utf-8'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'pdf': (export_pdf, 'application/pdf'),
+}
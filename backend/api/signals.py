@@ -0,0 +1,68 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from recipes.images import image_variants_built
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import Subscribe, User
+from .cache import invalidate_catalogue, invalidate_recipes
+from .feed import invalidate_feed
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipe(instance, **kwargs):
+    invalidate_recipes((instance.pk,))
+
+
+@receiver(image_variants_built, sender=Recipe)
+def invalidate_recipe_image(recipe_id, **kwargs):
+    invalidate_recipes((recipe_id,))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def invalidate_recipe_ingredient(instance, **kwargs):
+    invalidate_recipes((instance.recipe_id,))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_relations(instance, action, **kwargs):
+    if action.startswith('post_') and isinstance(instance, Recipe):
+        invalidate_recipes((instance.pk,))
+
+
+@receiver(pre_save, sender=User)
+def track_author_fields(instance, raw=False, update_fields=None, **kwargs):
+    """Отметить изменение полей автора, которые выводятся в Рецептах."""
+
+    instance.author_fields_changed = False
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and update_fields.isdisjoint(AUTHOR_FIELDS):
+        return
+    stored = User.objects.filter(
+        pk=instance.pk, recipes_count__gt=0
+    ).values_list(*AUTHOR_FIELDS).first()
+    instance.author_fields_changed = stored is not None and stored != tuple(
+        getattr(instance, field) for field in AUTHOR_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(instance, created, **kwargs):
+    if created or not getattr(instance, 'author_fields_changed', False):
+        return
+    invalidate_recipes(instance.recipe.values_list('id', flat=True))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_catalogue_objects(**kwargs):
+    invalidate_catalogue()
+
+
+@receiver((post_save, post_delete), sender=Subscribe)
+def invalidate_follower_feed(instance, **kwargs):
+    invalidate_feed(instance.user_id)
@@ -0,0 +1,190 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import Subscribe, User
+
+RECIPES_COUNT = 12
+PAGE_SIZES = (3, 12)
+INGREDIENTS_COUNTS = (1, 6)
+
+
+class RecipeQueriesTest(TestCase):
+    """Число запросов к БД не зависит от объёма страницы Рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Рецептов', password='Pa55word!',
+        )
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Читатель', last_name='Рецептов', password='Pa55word!',
+        )
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тэг {number}', color=f'#00000{number}',
+                slug=f'tag_{number}')
+            for number in range(2)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(max(INGREDIENTS_COUNTS))
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png',
+            )
+            for number in range(RECIPES_COUNT)
+        ]
+        for recipe in cls.recipes:
+            recipe.tags.set(cls.tags)
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+        FavoriteRecipe.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.authorized = APIClient()
+        self.authorized.force_authenticate(self.user)
+
+    def set_ingredients(self, count):
+        RecipeIngredient.objects.all().delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in self.recipes
+            for ingredient in self.ingredients[:count]
+        )
+        cache.clear()
+
+    def assert_queries(self, url, expected):
+        for name, client in (('anonymous', self.anonymous),
+                             ('authorized', self.authorized)):
+            with self.subTest(client=name):
+                cache.clear()
+                with self.assertNumQueries(expected[name]):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_list_queries(self):
+        for count in INGREDIENTS_COUNTS:
+            self.set_ingredients(count)
+            for page_size in PAGE_SIZES:
+                with self.subTest(ingredients=count, page_size=page_size):
+                    self.assert_queries(
+                        f'/api/recipes/?limit={page_size}',
+                        {'anonymous': 5, 'authorized': 6},
+                    )
+
+    def test_detail_queries(self):
+        for count in INGREDIENTS_COUNTS:
+            self.set_ingredients(count)
+            with self.subTest(ingredients=count):
+                self.assert_queries(
+                    f'/api/recipes/{self.recipes[0].pk}/',
+                    {'anonymous': 4, 'authorized': 5},
+                )
+
+
+class RecipeSerializerParityTest(TestCase):
+    """Быстрый сериализатор отдаёт тот же JSON, что и RecipeReadSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Рецептов', password='Pa55word!',
+        )
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Читатель', last_name='Рецептов', password='Pa55word!',
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тэг {number}', color=f'#00000{number}',
+                slug=f'tag_{number}')
+            for number in range(2)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(3)
+        )
+        variants = {
+            'thumbnail': 'recipes/images/recipe_thumbnail.jpg',
+            'webp': 'recipes/images/recipe.webp',
+        }
+        for number, image_variants in enumerate((variants, {}, variants)):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10 + number, image='recipes/images/recipe.png',
+                image_variants=image_variants,
+            )
+            recipe.tags.set(tags[:number + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=amount)
+                for amount, ingredient in enumerate(
+                    ingredients[:number + 1], start=1
+                )
+            )
+        cls.recipe = recipe
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+        FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def get_json(self, client, url, fast):
+        cache.clear()
+        with self.settings(FAST_RECIPE_SERIALIZER=fast):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fast_serializer_matches_regular(self):
+        authorized = APIClient()
+        authorized.force_authenticate(self.user)
+        for name, client in (('anonymous', APIClient()),
+                             ('authorized', authorized)):
+            for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/'):
+                with self.subTest(client=name, url=url):
+                    self.assertEqual(
+                        self.get_json(client, url, fast=True),
+                        self.get_json(client, url, fast=False),
+                    )
+
+
+class SubscriptionsRecipesLimitTest(TestCase):
+    """Параметр recipes_limit в подписках."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Рецептов', password='Pa55word!',
+        )
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Читатель', last_name='Рецептов', password='Pa55word!',
+        )
+        for number in range(3):
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png',
+            )
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+
+    def test_recipes_limit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for limit, expected in (('2', 2), ('0', 0), ('-1', 0), ('abc', 3)):
+            with self.subTest(recipes_limit=limit):
+                response = client.get(
+                    '/api/users/subscriptions/',
+                    {'recipes_limit': limit},
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    len(response.json()['results'][0]['recipes']), expected
+                )
@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (IngredientsViewSet, RecipesViewSet,
+from api.views import (IngredientsViewSet, RecipesViewSet, StatsViewSet,
                        TagsViewSet, UsersViewSet,)
 
 app_name = 'api'
@@ -12,6 +12,7 @@ router_v1.register('users', UsersViewSet, basename='users')
 router_v1.register('tags', TagsViewSet, basename='tags')
 router_v1.register('ingredients', IngredientsViewSet, basename='ingredients')
 router_v1.register('recipes', RecipesViewSet, basename='recipes')
+router_v1.register('stats', StatsViewSet, basename='stats')
 
 urlpatterns = [
     path('', include(router_v1.urls)),
@@ -1,7 +1,12 @@
-from django.db.models.aggregates import Sum
-from django.db.models.expressions import Exists, OuterRef, Value
-from django.db.models import BooleanField
-from django.http import FileResponse
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.aggregates import Count
+from django.db.models.expressions import Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models import BooleanField, F, Max, Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
@@ -9,18 +14,35 @@ from rest_framework.decorators import action
 from rest_framework.permissions import (SAFE_METHODS, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
-                            RecipeIngredient, ShoppingCart, Tag)
+                            RecipeIngredient, ShoppingCart,
+                            ShoppingCartIngredient, Tag, IngredientStat,
+                            RecipeWeekStat, AuthorStat)
+from recipes.stats import get_week
 from users.models import Subscribe, User
+from .feed import decode_cursor, encode_cursor, get_feed
 from .filters import IngredientFilter, RecipeFilter
 from .serializers import (IngredientSerializer, RecipeReadSerializer,
+                          RecipeFastReadSerializer,
                           RecipeWriteSerializer, SubscriptionsSerializer,
                           TagSerializer, FavoriteSerializer,
                           ShoppingCartSerializer, SubscribeSerializer,
-                          CustomUserSerializer,)
+                          CustomUserSerializer, BulkRecipesSerializer,
+                          CoverageSerializer, IngredientStatSerializer,
+                          RecipeWeekStatSerializer, AuthorStatSerializer,)
+from .mixins import AnonymousCacheMixin, CatalogueCacheMixin
 from .permissions import IsAuthorOrAdminOrReadOnly
-from .pagination import LimitPagination
+from .pagination import LimitPagination, OptionalCursorPagination
+from .search import ingredient_index
+from .shopping_list import SHOPPING_LIST_FORMATS, get_shopping_list
+from foodgram.constant import (CATALOGUE_INGREDIENTS, CATALOGUE_TAGS,
+                               FEED_MAX_PAGE_SIZE, FEED_PAGE_SIZE,
+                               INGREDIENT_SEARCH_LIMIT,
+                               SHOPPING_LIST_DEFAULT_FORMAT,
+                               SHOPPING_LIST_FILENAME, STATS_DEFAULT_LIMIT,
+                               STATS_TOP_SIZE)
 
 
 class UsersViewSet(UserViewSet):
@@ -29,9 +51,23 @@ class UsersViewSet(UserViewSet):
     queryset = User.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly,)
     serializers_class = CustomUserSerializer
-    pagination_class = LimitPagination
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('-id',)
     lookup_field = 'id'
 
+    def get_queryset(self):
+        user = self.request.user
+        queryset = super().get_queryset()
+        if user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Exists(
+                    Subscribe.objects.filter(
+                        user=user,
+                        author=OuterRef('id'),
+                    ))
+            )
+        return queryset
+
     def get_permissions(self):
         if self.action == 'me':
             self.permission_classes = (IsAuthenticated,)
@@ -42,10 +78,20 @@ class UsersViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),)
     def subscriptions(self, request):
         user = request.user
+        recipes_limit = SubscriptionsSerializer.get_recipes_limit(request)
         queryset = User.objects.filter(
             following__user=user).annotate(
-            is_subscribed=Value(True, output_field=BooleanField())
+            is_subscribed=Value(True, output_field=BooleanField()),
+            subscription_id=F('following__id'),
+        ).prefetch_related(
+            Prefetch(
+                'recipe',
+                queryset=Recipe.objects.order_by(
+                    '-pub_date', '-id')[:recipes_limit],
+                to_attr='limited_recipes',
+            )
         ).order_by('following__user')
+        self.cursor_ordering = ('-subscription_id',)
         pages = self.paginate_queryset(queryset)
         serializer = SubscriptionsSerializer(
             pages, many=True,
@@ -56,37 +102,51 @@ class UsersViewSet(UserViewSet):
             permission_classes=(IsAuthenticated,))
     def subscribe(self, request, id):
         author = get_object_or_404(User, id=id)
-        data = {'user': request.user.id, 'author': author.id}
-        serializer = SubscribeSerializer(data=data,
+        serializer = SubscribeSerializer(data={},
                                          context={'request': request})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer.save(user=request.user, author=author)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
     def delete_subscribe(self, request, id):
-        subscription = Subscribe.objects.filter(
+        deleted, _ = Subscribe.objects.filter(
             user=request.user, author_id=id
-        )
-        if subscription.exists():
-            subscription.delete()
+        ).delete()
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({'errors': 'Подписка не найдена.'},
                         status=status.HTTP_404_NOT_FOUND)
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с Рецептами."""
 
     filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Recipe.objects.select_related('author').prefetch_related(
-            'tags', 'ingredients')
+        queryset = Recipe.objects.prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=RecipeIngredient.objects.select_related('ingredient'),
+            ),
+        )
         if user.is_authenticated:
-            return queryset.annotate(
+            authors = User.objects.annotate(
+                is_subscribed=Exists(
+                    Subscribe.objects.filter(
+                        user=user,
+                        author=OuterRef('id'),
+                    ))
+            )
+            return queryset.prefetch_related(
+                Prefetch('author', queryset=authors)
+            ).annotate(
                 is_favorited=Exists(
                     FavoriteRecipe.objects.filter(
                         user=user,
@@ -99,67 +159,239 @@ class RecipesViewSet(viewsets.ModelViewSet):
                     ))
             ).order_by('-pub_date')
 
-        return queryset
+        return queryset.select_related('author')
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
+            if settings.FAST_RECIPE_SERIALIZER:
+                return RecipeFastReadSerializer
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
-    @staticmethod
-    def create_shopping_list(ingredients):
-        content = 'Список покупок:\n\n'
-        for num, index in enumerate(ingredients):
-            content += (
-                f'{num + 1}. {index["ingredient__name"]} - '
-                f'{index["amount"]} {index["ingredient__measurement_unit"]}\n'
+    def perform_destroy(self, instance):
+        users = list(ShoppingCart.objects.filter(
+            recipe=instance
+        ).values_list('user', flat=True))
+        instance.delete()
+        ShoppingCartIngredient.objects.refresh(users)
+
+    @action(detail=False, methods=['GET'],
+            permission_classes=[IsAuthenticated],)
+    def download_shopping_cart(self, request):
+        """Метод выполняющий выгрузку Корзины Пользователя.
+
+        Формат файла (txt, csv или pdf) задаётся параметром file_format.
+        """
+
+        file_format = request.query_params.get(
+            'file_format', SHOPPING_LIST_DEFAULT_FORMAT
+        )
+        if file_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                data={'errors': 'Допустимые форматы: '
+                      f'{", ".join(SHOPPING_LIST_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        response = FileResponse(
-            content, content_type='text/plain; charset=utf-8'
+        export, content_type = SHOPPING_LIST_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            export(get_shopping_list(request.user)),
+            content_type=content_type,
         )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="{SHOPPING_LIST_FILENAME}.{file_format}"'
         )
         return response
 
     @action(detail=False, methods=['GET'],
             permission_classes=[IsAuthenticated],)
-    def download_shopping_cart(self, request):
-        """Метод выполняющий выгрузку Корзины Пользователя в TXT формате."""
+    def feed(self, request):
+        """Лента Рецептов авторов из подписок Пользователя.
+
+        Страницы листаются по ссылке next, размер страницы задаётся
+        параметром limit.
+        """
+
+        cursor = request.query_params.get('cursor')
+        try:
+            before = decode_cursor(cursor) if cursor else None
+        except ValueError as error:
+            return Response({'errors': str(error)},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            limit = FEED_PAGE_SIZE
+        limit = min(max(limit, 1), FEED_MAX_PAGE_SIZE)
+
+        positions = get_feed(request.user, before, limit)
+        recipes = self.get_queryset().in_bulk(
+            [pk for _, pk in positions]
+        )
+        serializer = self.get_serializer(
+            [recipes[pk] for _, pk in positions if pk in recipes],
+            many=True,
+        )
+        next_link = None
+        if len(positions) == limit:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), 'cursor',
+                encode_cursor(positions[-1]),
+            )
+        return Response({'next': next_link, 'results': serializer.data})
+
+    @staticmethod
+    def count_recipe_ingredients(condition):
+        return Coalesce(
+            Subquery(
+                RecipeIngredient.objects.filter(
+                    condition, recipe=OuterRef('pk')
+                ).order_by().values('recipe').annotate(
+                    count=Count('*')
+                ).values('count')
+            ),
+            0,
+        )
+
+    @action(detail=False, methods=['GET'],
+            pagination_class=LimitPagination,)
+    def can_cook(self, request):
+        """Рецепты, которые можно приготовить из имеющихся Ингредиентов.
+
+        Ингредиенты передаются параметром ingredients, допустимое число
+        недостающих Ингредиентов — параметром missing. Рецепты
+        упорядочены по числу недостающих, затем покрытых Ингредиентов.
+        """
+
+        serializer = CoverageSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ingredients = Q(
+            ingredient__in=serializer.validated_data['ingredients']
+        )
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            id__in=RecipeIngredient.objects.filter(
+                ingredients
+            ).values('recipe')
+        ).annotate(
+            covered=self.count_recipe_ingredients(ingredients),
+            missing=self.count_recipe_ingredients(~ingredients),
+        ).filter(
+            missing__lte=serializer.validated_data['missing']
+        ).order_by('missing', '-covered', '-pub_date', '-id')
 
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount')).order_by('ingredient__name')
-        return self.create_shopping_list(ingredients)
+        page = self.paginate_queryset(queryset)
+        data = self.get_serializer(page, many=True).data
+        for recipe, item in zip(page, data):
+            item['covered_ingredients'] = recipe.covered
+            item['missing_ingredients'] = recipe.missing
+        return self.get_paginated_response(data)
 
     @staticmethod
     def add_shopping_cart_or_favorite(request, pk, serializers):
         context = {'request': request}
-        data = {
-            'user': request.user.id,
-            'recipe': pk
-        }
+        data = {'recipe': pk}
         serializer = serializers(data=data, context=context)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer.save(user=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @staticmethod
     def delete_shopping_cart_or_favorite(request, pk, model):
-        recipe = model.objects.filter(
+        deleted, _ = model.objects.filter(
             user=request.user,
             recipe_id=pk
-        )
-        if recipe.exists():
-            recipe.delete()
+        ).delete()
+        if deleted:
+            if model is ShoppingCart:
+                ShoppingCartIngredient.objects.refresh(
+                    (request.user,), (pk,)
+                )
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
             data={'errors': 'Рецепт не найден в вашем списке'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @staticmethod
+    def bulk_add_shopping_cart_or_favorite(request, model):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['recipes']
+        with transaction.atomic():
+            found = set(Recipe.objects.filter(
+                id__in=ids
+            ).values_list('id', flat=True))
+            added = model.objects.add(
+                request.user, [pk for pk in ids if pk in found]
+            )
+            if added and model is FavoriteRecipe:
+                Recipe.objects.filter(id__in=added).update(
+                    favorites_count=F('favorites_count') + 1
+                )
+            if added and model is ShoppingCart:
+                ShoppingCartIngredient.objects.refresh(
+                    (request.user,), added
+                )
+        return Response([
+            {'id': pk,
+             'status': ('not_found' if pk not in found
+                        else 'added' if pk in added else 'exists')}
+            for pk in ids
+        ])
+
+    @staticmethod
+    def bulk_delete_shopping_cart_or_favorite(request, model):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['recipes']
+        relations = model.objects.filter(
+            user=request.user, recipe_id__in=ids
+        )
+        removed = set(relations.values_list('recipe_id', flat=True))
+        relations.delete()
+        if removed and model is ShoppingCart:
+            ShoppingCartIngredient.objects.refresh((request.user,), removed)
+        return Response([
+            {'id': pk,
+             'status': 'removed' if pk in removed else 'not_in_list'}
+            for pk in ids
+        ])
+
+    @action(
+        detail=False,
+        methods=('POST',),
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        permission_classes=[IsAuthenticated])
+    def bulk_shopping_cart(self, request):
+        """Массовое добавление Рецептов в Корзину."""
+        return self.bulk_add_shopping_cart_or_favorite(request, ShoppingCart)
+
+    @bulk_shopping_cart.mapping.delete
+    def bulk_destroy_shopping_cart(self, request):
+        """Массовое удаление Рецептов из Корзины."""
+        return self.bulk_delete_shopping_cart_or_favorite(
+            request, ShoppingCart
+        )
+
+    @action(
+        detail=False,
+        methods=('POST',),
+        url_path='favorite',
+        url_name='favorite-bulk',
+        permission_classes=[IsAuthenticated])
+    def bulk_favorite(self, request):
+        """Массовое добавление Рецептов в Избранное."""
+        return self.bulk_add_shopping_cart_or_favorite(
+            request, FavoriteRecipe
+        )
+
+    @bulk_favorite.mapping.delete
+    def bulk_destroy_favorite(self, request):
+        """Массовое удаление Рецептов из Избранного."""
+        return self.bulk_delete_shopping_cart_or_favorite(
+            request, FavoriteRecipe
+        )
+
     @action(
         detail=True,
         methods=('POST',),
@@ -191,20 +423,101 @@ class RecipesViewSet(viewsets.ModelViewSet):
         )
 
 
-class TagsViewSet(viewsets.ModelViewSet):
+class TagsViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с Тэгами."""
 
+    catalogue = CATALOGUE_TAGS
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
     http_method_names = ('get',)
 
 
-class IngredientsViewSet(viewsets.ModelViewSet):
+class IngredientsViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с Ингредиентами."""
 
+    catalogue = CATALOGUE_INGREDIENTS
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filterset_class = IngredientFilter
     pagination_class = None
     http_method_names = ('get',)
+
+    def list_catalogue(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list_catalogue(request, *args, **kwargs)
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            limit = INGREDIENT_SEARCH_LIMIT
+        if not 0 < limit <= INGREDIENT_SEARCH_LIMIT:
+            limit = INGREDIENT_SEARCH_LIMIT
+        serializer = self.get_serializer(
+            ingredient_index.search(name, self.catalogue_version, limit),
+            many=True
+        )
+        return Response(serializer.data)
+
+
+class StatsViewSet(viewsets.GenericViewSet):
+    """Вьюсет рейтингов популярности.
+
+    Ответы строятся по сводным таблицам, которые пересчитывает
+    команда rollup_stats. Длина рейтинга задаётся параметром limit.
+    """
+
+    pagination_class = None
+    http_method_names = ('get',)
+
+    @staticmethod
+    def get_limit(request):
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            return STATS_DEFAULT_LIMIT
+        return min(max(limit, 1), STATS_TOP_SIZE)
+
+    @action(detail=False)
+    def ingredients(self, request):
+        """Самые используемые Ингредиенты."""
+        queryset = IngredientStat.objects.select_related(
+            'ingredient'
+        )[:self.get_limit(request)]
+        return Response(IngredientStatSerializer(queryset, many=True).data)
+
+    @action(detail=False)
+    def recipes(self, request):
+        """Рецепты, чаще всего добавляемые в Избранное за неделю.
+
+        Неделя задаётся любой своей датой в параметре week, по умолчанию
+        берётся последняя рассчитанная неделя.
+        """
+        week = request.query_params.get('week')
+        if week:
+            try:
+                week = get_week(date.fromisoformat(week))
+            except ValueError:
+                return Response(
+                    {'errors': 'Дата недели должна быть в формате '
+                     'ГГГГ-ММ-ДД.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            week = RecipeWeekStat.objects.aggregate(
+                week=Max('week')
+            )['week']
+        queryset = RecipeWeekStat.objects.filter(
+            week=week
+        ).select_related('recipe')[:self.get_limit(request)]
+        return Response(RecipeWeekStatSerializer(
+            queryset, many=True, context={'request': request}
+        ).data)
+
+    @action(detail=False)
+    def authors(self, request):
+        """Авторы с наибольшим числом подписчиков."""
+        queryset = AuthorStat.objects.select_related(
+            'author'
+        )[:self.get_limit(request)]
+        return Response(AuthorStatSerializer(queryset, many=True).data)
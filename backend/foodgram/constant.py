@@ -27,3 +27,96 @@ COLOR_PALETTE = [
 
 MIN_VALUE_IGRREDIENTS_ADMIN = 1
 NO_VALUE = '-Не задано-'
+
+# api shopping list
+
+SHOPPING_LIST_TITLE = 'Список покупок:'
+SHOPPING_LIST_FILENAME = 'shopping_list'
+SHOPPING_LIST_DEFAULT_FORMAT = 'txt'
+SHOPPING_LIST_CHUNK_SIZE = 500
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_LINE_HEIGHT = 20
+PDF_MARGIN = 50
+PDF_CHUNK_SIZE = 8192
+
+# recipes load_data
+
+LOAD_DATA_BATCH_SIZE = 1000
+
+# api catalogue cache
+
+CATALOGUE_TAGS = 'tags'
+CATALOGUE_INGREDIENTS = 'ingredients'
+CATALOGUE_CACHE_CONTROL = 'public, no-cache'
+
+# api ingredient search
+
+TRIGRAM_SIMILARITY_THRESHOLD = 0.3
+INGREDIENT_SEARCH_LIMIT = 50
+INGREDIENT_SEARCH_CANDIDATES = 1000
+
+# api recipe response cache
+
+RECIPE_CACHE_PREFIX = 'recipes'
+RECIPE_CACHE_TIMEOUT = 300
+# Дольше страницы: истёкшее поколение не должно открыть старую страницу.
+RECIPE_GENERATION_TIMEOUT = 2 * RECIPE_CACHE_TIMEOUT
+
+# recipes check_query_plans
+
+QUERY_PLAN_MIN_ROWS = 5000
+QUERY_PLAN_SMALL_TABLES = ('recipes_tag',)
+
+# api bulk shopping cart and favorites
+
+MAX_BULK_RECIPES = 100
+MAX_COVERAGE_INGREDIENTS = 100
+
+# recipes images
+
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+IMAGE_DECODE_CHUNK_SIZE = 64 * 1024
+IMAGE_SPOOL_SIZE = 1024 * 1024
+THUMBNAIL_SIZE = (480, 480)
+WEBP_QUALITY = 80
+IMAGE_DIR = 'static/recipe/'
+IMAGE_VARIANTS_DIR = 'static/recipe/variants/'
+MEDIA_GC_MIN_AGE = 60 * 60
+
+# recipes compare_recipe_serializers
+
+SERIALIZER_BENCHMARK_ROUNDS = 5
+
+# recipes full-text search
+
+FULLTEXT_CONFIG = 'russian'
+FULLTEXT_WEIGHTS = (10.0, 1.0, 4.0)
+FULLTEXT_BATCH_SIZE = 500
+
+# recipes reconcile_counters
+
+RECONCILE_BATCH_SIZE = 500
+
+# recipes popularity stats
+
+STATS_TOP_SIZE = 100
+STATS_DEFAULT_LIMIT = 10
+
+# api following feed
+
+FEED_CACHE_PREFIX = 'feed'
+FEED_CACHE_SIZE = 200
+FEED_CACHE_TIMEOUT = 60
+FEED_PAGE_SIZE = 6
+FEED_MAX_PAGE_SIZE = 100
+
+# recipes benchmark_api
+
+BENCHMARK_PREFIX = 'bench'
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': BENCHMARK_PREFIX,
+    },
+}
@@ -1,11 +1,15 @@
 import webcolors
 from django.contrib import admin
+from django.db.models import Prefetch
 from django.utils.safestring import mark_safe
 
 from foodgram.constant import (MIN_VALUE_IGRREDIENTS_ADMIN,
                                NO_VALUE)
-from .models import (FavoriteRecipe, Ingredient, Recipe,
-                     RecipeIngredient, ShoppingCart, Tag)
+from .fulltext import refresh_recipe_search
+from .models import (AuthorStat, FavoriteRecipe, Ingredient,
+                     IngredientStat, Recipe, RecipeWeekStat,
+                     RecipeIngredient, ShoppingCart,
+                     ShoppingCartIngredient, Tag)
 
 
 admin.site.empty_value_display = NO_VALUE
@@ -36,6 +40,52 @@ class RecipeAdmin(admin.ModelAdmin):
 
     inlines = (RecipeIngredientAdmin,)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=RecipeIngredient.objects.select_related('ingredient'),
+            ),
+        )
+
+    @staticmethod
+    def get_amounts(recipe):
+        return dict(RecipeIngredient.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient', 'amount'))
+
+    def save_related(self, request, form, formsets, change):
+        old_amounts = self.get_amounts(form.instance) if change else {}
+        super().save_related(request, form, formsets, change)
+        refresh_recipe_search((form.instance.pk,))
+        if not change:
+            return
+        amounts = self.get_amounts(form.instance)
+        ingredients = {
+            ingredient for ingredient in old_amounts.keys() | amounts.keys()
+            if old_amounts.get(ingredient) != amounts.get(ingredient)
+        }
+        if ingredients:
+            ShoppingCartIngredient.objects.refresh(
+                ShoppingCart.objects.filter(
+                    recipe=form.instance
+                ).values('user'),
+                ingredients=ingredients,
+            )
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Recipe.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        users = list(ShoppingCart.objects.filter(
+            recipe__in=queryset
+        ).values_list('user', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        ShoppingCartIngredient.objects.refresh(users)
+
     @admin.display(description='Электронная почта автора',)
     def get_author(self, obj):
         return obj.author.email
@@ -48,15 +98,14 @@ class RecipeAdmin(admin.ModelAdmin):
     @admin.display(description=' Ингредиенты ')
     def get_ingredients(self, obj):
         return ', '.join([
-            f'{item["ingredient__name"]} - {item["amount"]}'
-            f' {item["ingredient__measurement_unit"]}.'
-            for item in obj.recipe.values(
-                'ingredient__name',
-                'amount', 'ingredient__measurement_unit')])
+            f'{item.ingredient.name} - {item.amount}'
+            f' {item.ingredient.measurement_unit}.'
+            for item in obj.recipe.all()])
 
-    @admin.display(description='В избранном')
+    @admin.display(description='В избранном',
+                   ordering='favorites_count')
     def get_favorite_count(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
     @admin.display(description='Изображение')
     def get_image(self, obj):
@@ -112,3 +161,67 @@ class SoppingCartAdmin(admin.ModelAdmin):
     """Административная панель Корзины Пользователя. """
 
     list_display = ('id', 'user', 'recipe')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        ShoppingCartIngredient.objects.refresh(
+            (obj.user_id, form.initial.get('user', obj.user_id))
+        )
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        ShoppingCartIngredient.objects.refresh((obj.user_id,))
+
+    def delete_queryset(self, request, queryset):
+        users = list(queryset.values_list('user', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        ShoppingCartIngredient.objects.refresh(users)
+
+
+class StatAdmin(admin.ModelAdmin):
+    """Административная панель сводной таблицы популярности.
+
+    Таблицы заполняет команда rollup_stats, поэтому они только для чтения.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IngredientStat)
+class IngredientStatAdmin(StatAdmin):
+    """Административная панель рейтинга Ингредиентов."""
+
+    list_display = ('rank', 'ingredient', 'recipes_count')
+    list_select_related = ('ingredient',)
+
+
+@admin.register(RecipeWeekStat)
+class RecipeWeekStatAdmin(StatAdmin):
+    """Административная панель рейтинга Рецептов недели."""
+
+    list_display = ('week', 'rank', 'get_recipe', 'favorites_count')
+    list_filter = ('week',)
+    list_select_related = ('recipe',)
+
+    @admin.display(description='Рецепт')
+    def get_recipe(self, obj):
+        return obj.recipe.name
+
+
+@admin.register(AuthorStat)
+class AuthorStatAdmin(StatAdmin):
+    """Административная панель рейтинга авторов."""
+
+    list_display = ('rank', 'get_author', 'followers_count', 'recipes_count')
+    list_select_related = ('author',)
+
+    @admin.display(description='Автор')
+    def get_author(self, obj):
+        return obj.author.username
@@ -0,0 +1,102 @@
+"""Полнотекстовый поиск Рецептов.
+
+В PostgreSQL документ Рецепта хранится в столбце search_vector таблицы
+Рецептов под GIN-индексом, в SQLite — в виртуальной таблице FTS5.
+Оба создаются миграцией 0010_recipe_fulltext_search и обновляются
+функцией refresh_recipe_search при записи Рецепта.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from foodgram.constant import (FULLTEXT_BATCH_SIZE, FULLTEXT_CONFIG,
+                               FULLTEXT_WEIGHTS)
+
+INGREDIENT_NAMES = (
+    'SELECT {aggregate} FROM recipes_recipeingredient ri '
+    'JOIN recipes_ingredient i ON i.id = ri.ingredient_id '
+    'WHERE ri.recipe_id = r.id'
+)
+POSTGRES_UPDATE = (
+    'UPDATE recipes_recipe r SET search_vector = '
+    "setweight(to_tsvector('{config}', coalesce(r.name, '')), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce(r.text, '')), 'B') || "
+    "setweight(to_tsvector('{config}', coalesce(({names}), '')), 'C')"
+).format(
+    config=FULLTEXT_CONFIG,
+    names=INGREDIENT_NAMES.format(aggregate="string_agg(i.name, ' ')"),
+)
+POSTGRES_QUERY = "websearch_to_tsquery('{config}', %s)".format(
+    config=FULLTEXT_CONFIG
+)
+SQLITE_DELETE = 'DELETE FROM recipes_recipe_fts WHERE rowid IN ({ids})'
+SQLITE_INSERT = (
+    'INSERT INTO recipes_recipe_fts (rowid, name, text, ingredients) '
+    "SELECT r.id, r.name, r.text, ({names}) FROM recipes_recipe r "
+    'WHERE r.id IN ({{ids}})'
+).format(names=INGREDIENT_NAMES.format(aggregate="group_concat(i.name, ' ')"))
+SQLITE_MATCH = (
+    'SELECT rowid FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s'
+)
+SQLITE_RANK = (
+    'SELECT -bm25(recipes_recipe_fts, {weights}) FROM recipes_recipe_fts '
+    'WHERE recipes_recipe_fts MATCH %s '
+    'AND recipes_recipe_fts.rowid = recipes_recipe.id'
+).format(weights=', '.join(map(str, FULLTEXT_WEIGHTS)))
+
+
+def refresh_recipe_search(recipe_ids):
+    """Перестроить поисковый документ Рецептов.
+
+    Для удалённых Рецептов документ просто удаляется.
+    """
+
+    recipe_ids = list(recipe_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(recipe_ids), FULLTEXT_BATCH_SIZE):
+            batch = recipe_ids[start:start + FULLTEXT_BATCH_SIZE]
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'{POSTGRES_UPDATE} WHERE r.id = ANY(%s)',
+                               (batch,))
+            elif connection.vendor == 'sqlite':
+                ids = ', '.join(['%s'] * len(batch))
+                cursor.execute(SQLITE_DELETE.format(ids=ids), batch)
+                cursor.execute(SQLITE_INSERT.format(ids=ids), batch)
+
+
+def get_sqlite_query(query):
+    """Запрос FTS5: все слова обязательны, каждое ищется по префиксу."""
+
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_recipes(queryset, query):
+    """Отфильтровать Рецепты по запросу и упорядочить по релевантности."""
+
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(id__in=RawSQL(
+            'SELECT id FROM recipes_recipe '
+            f'WHERE search_vector @@ {POSTGRES_QUERY}',
+            (query,),
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank_cd(recipes_recipe.search_vector, {POSTGRES_QUERY})',
+            (query,),
+            output_field=FloatField(),
+        ))
+    elif connection.vendor == 'sqlite':
+        query = get_sqlite_query(query)
+        if not query:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL(SQLITE_MATCH, (query,))
+        ).annotate(search_rank=RawSQL(
+            SQLITE_RANK, (query,), output_field=FloatField()
+        ))
+    else:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(text__icontains=query)
+        ).order_by('-pub_date', '-id')
+    return queryset.order_by('-search_rank', '-pub_date', '-id')
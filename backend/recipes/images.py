@@ -0,0 +1,91 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from .storage import recipe_storage, release_files
+from foodgram.constant import (IMAGE_VARIANTS_DIR, THUMBNAIL_SIZE,
+                               WEBP_QUALITY)
+
+logger = logging.getLogger(__name__)
+
+# Варианты записываются через update(), поэтому post_save не отправляется.
+image_variants_built = Signal()
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS,
+    thread_name_prefix='recipe-images',
+)
+
+
+def save_webp(image, name):
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+    return recipe_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def render_variants(image_name):
+    """Уменьшенная копия и WebP-версия изображения Рецепта."""
+
+    stem = PurePosixPath(image_name).stem
+    with recipe_storage.open(image_name) as file:
+        with Image.open(file) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            variants = {
+                'webp': save_webp(
+                    image, f'{IMAGE_VARIANTS_DIR}{stem}.webp'
+                ),
+            }
+            image.thumbnail(THUMBNAIL_SIZE)
+            variants['thumbnail'] = save_webp(
+                image, f'{IMAGE_VARIANTS_DIR}{stem}_thumbnail.webp'
+            )
+    return variants
+
+
+def build_image_variants(recipe_id, image_name):
+    """Построить варианты изображения и сохранить их в Рецепте.
+
+    Варианты записываются, только если у Рецепта всё ещё то же
+    изображение; иначе результат отбрасывается. Возвращает True,
+    если варианты сохранены.
+    """
+    from .models import Recipe
+
+    close_old_connections()
+    try:
+        variants = render_variants(image_name)
+        updated = Recipe.objects.filter(
+            pk=recipe_id, image=image_name
+        ).update(image_variants=variants)
+        if not updated:
+            release_files(variants.values())
+            return False
+        image_variants_built.send(sender=Recipe, recipe_id=recipe_id)
+        return True
+    except Exception:
+        logger.exception(
+            'Не удалось обработать изображение рецепта %s', recipe_id
+        )
+        return False
+    finally:
+        close_old_connections()
+
+
+def schedule_image_variants(recipe):
+    """Поставить обработку изображения в очередь после коммита."""
+
+    if not recipe.image:
+        return
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: executor.submit(build_image_variants, recipe_id, image_name)
+    )
@@ -0,0 +1,315 @@
+import json
+import random
+import statistics
+from collections import Counter
+from io import StringIO
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.cache import invalidate_catalogue
+from api.feed import invalidate_feed
+from recipes.fulltext import refresh_recipe_search
+from recipes.models import (CatalogueVersion, FavoriteRecipe, Ingredient,
+                            Recipe, RecipeIngredient, ShoppingCart,
+                            ShoppingCartIngredient, Tag)
+from users.models import Subscribe, User
+from foodgram.constant import (BENCHMARK_CACHES, BENCHMARK_PREFIX,
+                               CATALOGUE_INGREDIENTS, CATALOGUE_TAGS,
+                               LOAD_DATA_BATCH_SIZE)
+
+WORDS = (
+    'борщ', 'салат', 'суп', 'пирог', 'каша', 'рагу', 'омлет', 'плов',
+    'запеканка', 'соус', 'блины', 'котлеты', 'паста', 'гуляш', 'шарлотка',
+)
+
+
+class Command(BaseCommand):
+    """Нагрузочный замер API на синтетических данных."""
+
+    help = (
+        'Заполняет базу синтетическими данными заданного объёма, '
+        'прогоняет запросы к эндпоинтам API через тестовый клиент и '
+        'сохраняет число запросов к БД, задержки p50/p95/p99 и RPS в JSON. '
+        'По умолчанию замер идёт во временной тестовой базе, которая '
+        'удаляется после замера; кеш всегда подменяется локальным.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=500)
+        parser.add_argument('--ingredients', type=int, default=300,
+                            help='Размер справочника Ингредиентов.')
+        parser.add_argument('--ingredients-per-recipe', type=int,
+                            default=8)
+        parser.add_argument('--favorites', type=int, default=1000)
+        parser.add_argument('--carts', type=int, default=500)
+        parser.add_argument('--follows', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Число запросов на каждый эндпоинт.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='',
+                            help='Метка замера, например хеш коммита.')
+        parser.add_argument('--output', default='benchmark.json',
+                            help='Файл для результатов.')
+        parser.add_argument(
+            '--use-configured-database', action='store_true',
+            help='Заполнять базу из настроек, а не временную тестовую. '
+                 'Только для отдельной копии базы, не для рабочей.',
+        )
+        parser.add_argument(
+            '--keep-data', action='store_true',
+            help='Не откатывать синтетические данные. Только вместе с '
+                 '--use-configured-database.',
+        )
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false',
+            dest='interactive',
+            help='Не спрашивать подтверждения перед удалением '
+                 'оставшейся тестовой базы.',
+        )
+
+    def handle(self, *args, **options):
+        if options['keep_data'] and not options['use_configured_database']:
+            raise CommandError(
+                '--keep-data имеет смысл только с --use-configured-database.'
+            )
+        self.random = random.Random(options['seed'])
+        self.user_ids = []
+        old_name = None
+        setup_test_environment()
+        try:
+            if not options['use_configured_database']:
+                old_name = connection.settings_dict['NAME']
+                connection.creation.create_test_db(
+                    verbosity=0,
+                    autoclobber=not options['interactive'],
+                    serialize=False,
+                )
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                results = self.measure(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        if options['keep_data']:
+            invalidate_catalogue()
+            for user_id in self.user_ids:
+                invalidate_feed(user_id)
+
+        report = {
+            'label': options['label'],
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'scale': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'ingredients',
+                    'ingredients_per_recipe', 'favorites', 'carts',
+                    'follows', 'requests', 'seed',
+                )
+            },
+            'endpoints': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}.'
+        ))
+
+    def measure(self, options):
+        with transaction.atomic():
+            started = perf_counter()
+            self.seed(options)
+            seconds = perf_counter() - started
+            self.stdout.write(f'Данные созданы за {seconds:.1f} с.')
+            results = self.run_scenarios(options['requests'])
+            if not options['keep_data']:
+                transaction.set_rollback(True)
+        return results
+
+    def sample_pairs(self, left, right, count):
+        pairs = set()
+        limit = min(count, len(left) * len(right))
+        while len(pairs) < limit:
+            pairs.add((self.random.choice(left), self.random.choice(right)))
+        return pairs
+
+    def seed(self, options):
+        prefix = f'{BENCHMARK_PREFIX}{timezone.now():%H%M%S}'
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(
+                email=f'{prefix}_{number}@example.com',
+                username=f'{prefix}_{number}',
+                first_name='Бенчмарк',
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(options['users'])
+        )
+        self.user_ids = [user.pk for user in users]
+        tags = Tag.objects.bulk_create(
+            Tag(
+                name=f'{prefix} {word}',
+                color=f'#{number * 40:06X}',
+                slug=f'{prefix}_{number}',
+            )
+            for number, word in enumerate(WORDS[:5])
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            (Ingredient(name=f'{prefix} ингредиент {number}',
+                        measurement_unit='г')
+             for number in range(options['ingredients'])),
+            batch_size=LOAD_DATA_BATCH_SIZE,
+        )
+        recipes = Recipe.objects.bulk_create(
+            (Recipe(
+                author=self.random.choice(users),
+                name=' '.join(self.random.sample(WORDS, 2)).capitalize(),
+                text=' '.join(self.random.choices(WORDS, k=20)),
+                cooking_time=self.random.randint(1, 180),
+                image='static/recipe/benchmark.png',
+            ) for _ in range(options['recipes'])),
+            batch_size=LOAD_DATA_BATCH_SIZE,
+        )
+        per_recipe = min(options['ingredients_per_recipe'], len(ingredients))
+        RecipeIngredient.objects.bulk_create(
+            (RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                              amount=self.random.randint(1, 500))
+             for recipe in recipes
+             for ingredient in self.random.sample(ingredients, per_recipe)),
+            batch_size=LOAD_DATA_BATCH_SIZE,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (Recipe.tags.through(recipe=recipe, tag=tag)
+             for recipe in recipes
+             for tag in self.random.sample(tags, 2)),
+            batch_size=LOAD_DATA_BATCH_SIZE,
+        )
+        for model, count in ((FavoriteRecipe, options['favorites']),
+                             (ShoppingCart, options['carts'])):
+            model.objects.bulk_create(
+                (model(user=user, recipe=recipe) for user, recipe
+                 in self.sample_pairs(users, recipes, count)),
+                batch_size=LOAD_DATA_BATCH_SIZE,
+            )
+        Subscribe.objects.bulk_create(
+            (Subscribe(user=user, author=author) for user, author
+             in self.sample_pairs(users, users, options['follows'])
+             if user != author),
+            batch_size=LOAD_DATA_BATCH_SIZE,
+        )
+
+        ShoppingCartIngredient.objects.refresh(users)
+        refresh_recipe_search(recipe.pk for recipe in recipes)
+        for catalogue in (CATALOGUE_TAGS, CATALOGUE_INGREDIENTS):
+            CatalogueVersion.objects.bump(catalogue)
+        call_command('reconcile_counters', stdout=StringIO())
+        call_command('rollup_stats', stdout=StringIO())
+
+        self.users, self.tags = users, tags
+        self.recipes, self.ingredients = recipes, ingredients
+
+    def get_scenarios(self):
+        """Эндпоинты замера: имя, анонимный ли запрос и генератор URL."""
+
+        choice = self.random.choice
+        recipe_ids = [recipe.pk for recipe in self.recipes]
+        ingredient_ids = [ingredient.pk for ingredient in self.ingredients]
+        pages = max(len(recipe_ids) // 6, 1)
+        return (
+            ('recipes_list_anonymous', True,
+             lambda: f'/api/recipes/?page={self.random.randint(1, pages)}'),
+            ('recipes_list', False,
+             lambda: f'/api/recipes/?page={self.random.randint(1, pages)}'),
+            ('recipes_list_cursor', False,
+             lambda: '/api/recipes/?pagination=cursor'),
+            ('recipes_list_filtered', False,
+             lambda: f'/api/recipes/?tags={choice(self.tags).slug}'
+                     '&is_favorited=0&is_in_shopping_cart=0'),
+            ('recipes_search', False,
+             lambda: f'/api/recipes/?search={choice(WORDS)}'),
+            ('recipe_detail_anonymous', True,
+             lambda: f'/api/recipes/{choice(recipe_ids)}/'),
+            ('recipe_detail', False,
+             lambda: f'/api/recipes/{choice(recipe_ids)}/'),
+            ('recipes_can_cook', False,
+             lambda: '/api/recipes/can_cook/?missing=2&ingredients='
+                     + ','.join(map(str, self.random.sample(
+                         ingredient_ids, min(30, len(ingredient_ids))
+                     )))),
+            ('recipes_feed', False, lambda: '/api/recipes/feed/'),
+            ('download_shopping_cart', False,
+             lambda: '/api/recipes/download_shopping_cart/'),
+            ('users_subscriptions', False,
+             lambda: '/api/users/subscriptions/?recipes_limit=3'),
+            ('users_list', False, lambda: '/api/users/'),
+            ('tags_list', True, lambda: '/api/tags/'),
+            ('ingredients_search', True,
+             lambda: f'/api/ingredients/?name={BENCHMARK_PREFIX}'),
+            ('stats_recipes', True, lambda: '/api/stats/recipes/'),
+        )
+
+    @staticmethod
+    def summarize(timings, queries, statuses, elapsed):
+        milliseconds = sorted(timing * 1000 for timing in timings)
+        percentiles = statistics.quantiles(
+            milliseconds, n=100, method='inclusive'
+        ) if len(milliseconds) > 1 else milliseconds * 99
+        return {
+            'requests': len(timings),
+            'statuses': dict(Counter(statuses)),
+            'rps': round(len(timings) / elapsed, 1),
+            'latency_ms': {
+                'mean': round(statistics.fmean(milliseconds), 2),
+                'p50': round(percentiles[49], 2),
+                'p95': round(percentiles[94], 2),
+                'p99': round(percentiles[98], 2),
+                'max': round(milliseconds[-1], 2),
+            },
+            'queries': {
+                'min': min(queries),
+                'max': max(queries),
+                'mean': round(statistics.fmean(queries), 2),
+            },
+        }
+
+    def run_scenarios(self, count):
+        anonymous = APIClient()
+        results = {}
+        for name, is_anonymous, build_url in self.get_scenarios():
+            client = anonymous
+            if not is_anonymous:
+                client = APIClient()
+                client.force_authenticate(self.random.choice(self.users))
+            timings, queries, statuses = [], [], []
+            started = perf_counter()
+            for _ in range(count):
+                url = build_url()
+                with CaptureQueriesContext(connection) as context:
+                    request_started = perf_counter()
+                    response = client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    timings.append(perf_counter() - request_started)
+                queries.append(len(context.captured_queries))
+                statuses.append(response.status_code)
+            results[name] = self.summarize(
+                timings, queries, statuses, perf_counter() - started
+            )
+            latency = results[name]['latency_ms']
+            self.stdout.write(
+                f'{name:<26} p50 {latency["p50"]:>8.2f} мс  '
+                f'p95 {latency["p95"]:>8.2f} мс  '
+                f'RPS {results[name]["rps"]:>8.1f}  '
+                f'запросов к БД {results[name]["queries"]["max"]}'
+            )
+        return results
@@ -0,0 +1,131 @@
+import re
+from itertools import product
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connection
+
+from api.filters import RecipeFilter
+from api.views import RecipesViewSet
+from recipes.models import FavoriteRecipe, Tag
+from foodgram.constant import QUERY_PLAN_MIN_ROWS, QUERY_PLAN_SMALL_TABLES
+
+SEQUENTIAL_SCANS = {
+    'sqlite': re.compile(r'\bSCAN (\S+)(?!.*\bUSING\b)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\S+)'),
+}
+
+
+class Command(BaseCommand):
+    """Проверка планов запросов списка Рецептов для всех фильтров."""
+
+    help = (
+        'Выполняет EXPLAIN для каждой комбинации фильтров RecipeFilter '
+        'и завершается с ошибкой при последовательном сканировании '
+        'больших таблиц. Маленькие таблицы планировщик вправе читать '
+        'целиком, поэтому они не проверяются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=QUERY_PLAN_MIN_ROWS,
+            help='Считать ошибкой полное сканирование таблицы, только '
+                 'если в ней не меньше строк.',
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Выводить планы всех запросов.',
+        )
+
+    def get_combinations(self):
+        favorite = FavoriteRecipe.objects.select_related('recipe').first()
+        tag = Tag.objects.first()
+        if favorite is None or tag is None:
+            raise CommandError(
+                'Нужны хотя бы один Тэг и одно Избранное для проверки.'
+            )
+        user, author = favorite.user, favorite.recipe.author_id
+        options = (
+            ('is_favorited', (None, '1', '0')),
+            ('is_in_shopping_cart', (None, '1', '0')),
+            ('author', (None, author)),
+            ('tags', (None, [tag.slug])),
+        )
+        names = [name for name, _ in options]
+        for values in product(*(values for _, values in options)):
+            yield user, {
+                name: value
+                for name, value in zip(names, values)
+                if value is not None
+            }
+
+    def get_queryset(self, user, data):
+        view = RecipesViewSet()
+        view.request = SimpleNamespace(user=user)
+        return RecipeFilter(
+            data, queryset=view.get_queryset()
+        ).qs[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+
+    def is_large(self, table, min_rows):
+        """Считается ли полное чтение таблицы ошибкой плана."""
+
+        if table in QUERY_PLAN_SMALL_TABLES:
+            return False
+        if table not in self.table_rows:
+            if table not in self.tables:
+                # Псевдоним подзапроса: размер неизвестен, считаем большим.
+                self.table_rows[table] = min_rows
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT COUNT(*) FROM '
+                        f'{connection.ops.quote_name(table)}'
+                    )
+                    self.table_rows[table] = cursor.fetchone()[0]
+        return self.table_rows[table] >= min_rows
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCANS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'База данных {connection.vendor} не поддерживается.'
+            )
+        self.tables = set(connection.introspection.table_names())
+        self.table_rows = {}
+        failures = checked = 0
+        for user, data in self.get_combinations():
+            plan = self.get_queryset(user, data).explain()
+            scans = sorted({
+                table for table in pattern.findall(plan)
+                if self.is_large(table, options['min_rows'])
+            })
+            if options['verbose_plans']:
+                self.stdout.write(f'{data}\n{plan}\n')
+            checked += 1
+            if scans:
+                failures += 1
+                self.stdout.write(self.style.ERROR(
+                    f'{data}: последовательное сканирование '
+                    f'{", ".join(scans)}'
+                ))
+        if failures:
+            raise CommandError(
+                f'Планов с последовательным сканированием: {failures}.'
+            )
+        small = sorted(
+            table for table, rows in self.table_rows.items()
+            if rows < options['min_rows']
+        )
+        if small:
+            self.stdout.write(self.style.WARNING(
+                f'Не проверялись таблицы меньше {options["min_rows"]} '
+                f'строк: {", ".join(small)}.'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено планов: {checked}. Большие таблицы читаются '
+            f'по индексам.'
+        ))
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from posixpath import join
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Recipe
+from recipes.storage import recipe_storage
+from foodgram.constant import IMAGE_DIR, MEDIA_GC_MIN_AGE
+
+
+class Command(BaseCommand):
+    """Удаление файлов изображений, на которые не ссылается ни один Рецепт."""
+
+    help = (
+        'Удаляет из хранилища изображения Рецептов и их варианты, '
+        'на которые больше нет ссылок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=MEDIA_GC_MIN_AGE,
+            help='Не трогать файлы моложе указанного числа секунд.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые были бы удалены.',
+        )
+
+    @staticmethod
+    def walk(directory):
+        if not recipe_storage.exists(directory):
+            return
+        directories, files = recipe_storage.listdir(directory)
+        for name in files:
+            yield join(directory, name)
+        for name in directories:
+            yield from Command.walk(join(directory, name))
+
+    @staticmethod
+    def get_referenced():
+        referenced = set()
+        recipes = Recipe.objects.values_list('image', 'image_variants')
+        for image, variants in recipes.iterator():
+            referenced.add(image)
+            referenced.update((variants or {}).values())
+        return referenced
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - timedelta(seconds=options['min_age'])
+        referenced = self.get_referenced()
+        removed = size = 0
+        for name in self.walk(IMAGE_DIR.rstrip('/')):
+            if name in referenced:
+                continue
+            if recipe_storage.get_modified_time(name) > threshold:
+                continue
+            size += recipe_storage.size(name)
+            removed += 1
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                recipe_storage.delete(name)
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} файлов: {removed}, {size / 1024:.1f} КБ.'
+        ))
@@ -0,0 +1,96 @@
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeFastReadSerializer, RecipeReadSerializer
+from api.views import RecipesViewSet
+from users.models import User
+from foodgram.constant import SERIALIZER_BENCHMARK_ROUNDS
+
+
+class Command(BaseCommand):
+    """Сверка и замер быстрого сериализатора Рецептов."""
+
+    help = (
+        'Сравнивает ответы RecipeFastReadSerializer и RecipeReadSerializer '
+        'и выводит время выгрузки на 100 Рецептов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя, от лица которого строить ответы.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Сколько Рецептов выгружать.',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=SERIALIZER_BENCHMARK_ROUNDS,
+            help='Сколько раз повторять замер.',
+        )
+
+    def get_request(self, username):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        if username is None:
+            request.user = AnonymousUser()
+            return request
+        try:
+            request.user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        return request
+
+    @staticmethod
+    def measure(serializer_class, recipes, context, rounds):
+        best = None
+        for _ in range(rounds):
+            started = perf_counter()
+            serializer_class(recipes, many=True, context=context).data
+            elapsed = perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        request = self.get_request(options['user'])
+        view = RecipesViewSet(request=request, format_kwarg=None)
+        recipes = list(view.get_queryset()[:options['limit']])
+        if not recipes:
+            raise CommandError('Нет Рецептов для сравнения.')
+        context = {'request': request, 'view': view}
+
+        expected = RecipeReadSerializer(
+            recipes, many=True, context=context
+        ).data
+        actual = RecipeFastReadSerializer(
+            recipes, many=True, context=context
+        ).data
+        for reference, fast in zip(expected, actual):
+            if dict(reference) != fast:
+                raise CommandError(
+                    f'Ответы для Рецепта {fast["id"]} различаются:\n'
+                    f'{dict(reference)}\n{fast}'
+                )
+
+        scale = 100 / len(recipes) * 1000
+        regular = self.measure(
+            RecipeReadSerializer, recipes, context, options['rounds']
+        ) * scale
+        fast = self.measure(
+            RecipeFastReadSerializer, recipes, context, options['rounds']
+        ) * scale
+        self.stdout.write(
+            f'Рецептов: {len(recipes)}\n'
+            f'RecipeReadSerializer: {regular:.2f} мс на 100 Рецептов\n'
+            f'RecipeFastReadSerializer: {fast:.2f} мс на 100 Рецептов'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ответы совпадают, ускорение в {regular / fast:.1f} раза.'
+        ))
@@ -1,39 +1,103 @@
-
 import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
+
+from recipes.models import CatalogueVersion, Ingredient, Tag
+from foodgram.constant import (CATALOGUE_INGREDIENTS, CATALOGUE_TAGS,
+                               LOAD_DATA_BATCH_SIZE)
+
+
+def read_csv(file, fields):
+    for row in csv.reader(file):
+        if row:
+            yield dict(zip(fields, row))
+
+
+def read_json(file, fields):
+    for item in json.load(file):
+        yield {field: item[field] for field in fields}
+
 
-from recipes.models import Ingredient, Tag
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
 
 
 class Command(BaseCommand):
-    """Команда загрузки Ингредиентов в Базу Данных."""
+    """Команда загрузки Ингредиентов и Тэгов в Базу Данных."""
 
-    help = 'Загрузка из csv файлов'
+    help = 'Загрузка Ингредиентов и Тэгов из csv или json файлов'
 
-    def handle(self, *args, **kwargs):
-        ingredient_file_path = f'{settings.BASE_DIR}/data/ingredients.csv'
-        tag_file_path = f'{settings.BASE_DIR}/data/tags.csv'
-        try:
-            with open(
-                ingredient_file_path, 'r', encoding='utf-8'
-            ) as ingredient_file:
-                reader = csv.reader(ingredient_file)
-                for row in reader:
-                    name, measurement_unit = row
-                    Ingredient.objects.get_or_create(
-                        name=name, measurement_unit=measurement_unit
-                    )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=f'{settings.BASE_DIR}/data/ingredients.csv',
+            help='Путь к файлу Ингредиентов (.csv или .json).',
+        )
+        parser.add_argument(
+            '--tags',
+            default=f'{settings.BASE_DIR}/data/tags.csv',
+            help='Путь к файлу Тэгов (.csv или .json).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOAD_DATA_BATCH_SIZE,
+            help='Количество записей в одной транзакции.',
+        )
+
+    def load(self, path, model, fields, key, catalogue, batch_size):
+        """Пакетная загрузка записей модели из файла."""
 
-            with open(tag_file_path, 'r', encoding='utf-8') as tag_file:
-                reader = csv.reader(tag_file)
-                for row in reader:
-                    name, color, slug = row
-                    Tag.objects.get_or_create(
-                        name=name, color=color, slug=slug
+        path = Path(path)
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise ValueError(f'Неподдерживаемый формат файла: {path.name}')
+        started = time.monotonic()
+        rows_count = 0
+        objects_count = model.objects.count()
+        with open(path, 'r', encoding='utf-8') as file:
+            rows = reader(file, fields)
+            while batch := list(islice(rows, batch_size)):
+                rows_count += len(batch)
+                unique_rows = {
+                    tuple(row[field] for field in key): row for row in batch
+                }
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        (model(**row) for row in unique_rows.values()),
+                        ignore_conflicts=True,
                     )
+        elapsed = time.monotonic() - started
+        created = model.objects.count() - objects_count
+        if created:
+            CatalogueVersion.objects.bump(catalogue)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: строк {rows_count}, '
+            f'добавлено {created}, {rows_count / max(elapsed, 1e-6):.0f} '
+            f'строк/с.'
+        )
 
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        try:
+            self.load(
+                options['ingredients'], Ingredient,
+                ('name', 'measurement_unit'), ('name', 'measurement_unit'),
+                CATALOGUE_INGREDIENTS, batch_size,
+            )
+            self.load(
+                options['tags'], Tag,
+                ('name', 'color', 'slug'), ('slug',),
+                CATALOGUE_TAGS, batch_size,
+            )
             self.stdout.write(self.style.SUCCESS(
                 'Ингредиенты и теги загружены!'
             ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipes.images import build_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Построение недостающих вариантов изображений Рецептов."""
+
+    help = (
+        'Строит уменьшенные копии и WebP-версии изображений Рецептов, '
+        'для которых их нет, например если фоновая обработка прервалась '
+        'перезапуском процесса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить варианты всех изображений.',
+        )
+
+    @staticmethod
+    def get_pending(rebuild_all):
+        recipes = Recipe.objects.exclude(
+            Q(image__isnull=True) | Q(image='')
+        )
+        if not rebuild_all:
+            recipes = recipes.exclude(
+                image_variants__has_keys=('webp', 'thumbnail')
+            )
+        return list(recipes.order_by('id').values_list('id', 'image'))
+
+    def handle(self, *args, **options):
+        pending = self.get_pending(options['all'])
+        built = sum(
+            build_image_variants(recipe_id, image_name)
+            for recipe_id, image_name in pending
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {built} из {len(pending)}.'
+        ))
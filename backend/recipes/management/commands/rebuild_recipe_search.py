@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.fulltext import refresh_recipe_search
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Перестроение полнотекстового индекса Рецептов."""
+
+    help = (
+        'Перестраивает поисковые документы всех Рецептов, например '
+        'после загрузки Рецептов в обход API.'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        refresh_recipe_search(recipe_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано Рецептов: {len(recipe_ids)}.'
+        ))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient)
+from users.models import Subscribe, User
+from foodgram.constant import RECONCILE_BATCH_SIZE
+
+COUNTERS = (
+    (Recipe, 'favorites_count', FavoriteRecipe, 'recipe'),
+    (Ingredient, 'recipes_count', RecipeIngredient, 'ingredient'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscribe, 'author'),
+)
+
+
+class Command(BaseCommand):
+    """Сверка хранимых счётчиков с фактическим числом связей."""
+
+    help = (
+        'Пересчитывает счётчики избранного у Рецептов, рецептов у '
+        'Ингредиентов, рецептов и подписчиков у Пользователей и '
+        'исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать число расхождений.',
+        )
+
+    @staticmethod
+    def count_by(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('*')
+            ).values('count')
+        ), 0)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for model, counter, related, field in COUNTERS:
+            actual = self.count_by(related, field)
+            drifted = list(model.objects.annotate(
+                actual=actual
+            ).exclude(**{counter: F('actual')}).values_list('pk', flat=True))
+            if not options['dry_run']:
+                for start in range(0, len(drifted), RECONCILE_BATCH_SIZE):
+                    model.objects.filter(
+                        pk__in=drifted[start:start + RECONCILE_BATCH_SIZE]
+                    ).update(**{counter: actual})
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}.{counter}: '
+                f'расхождений {len(drifted)}'
+            )
+        self.stdout.write(self.style.SUCCESS('Сверка завершена.'))
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from recipes.stats import (get_week, rollup_authors, rollup_ingredients,
+                           rollup_recipe_week)
+
+
+class Command(BaseCommand):
+    """Пересчёт сводных таблиц популярности."""
+
+    help = (
+        'Пересчитывает рейтинги Ингредиентов, Рецептов недели и авторов. '
+        'Рассчитана на периодический запуск, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weeks',
+            type=int,
+            default=1,
+            help='Сколько последних недель пересчитать для Рецептов.',
+        )
+
+    def handle(self, *args, **options):
+        ingredients = rollup_ingredients()
+        self.stdout.write(f'Ингредиентов в рейтинге: {len(ingredients)}')
+        week = get_week()
+        for _ in range(options['weeks']):
+            recipes = rollup_recipe_week(week)
+            self.stdout.write(
+                f'Рецептов в рейтинге недели {week}: {len(recipes)}'
+            )
+            week -= timedelta(days=7)
+        authors = rollup_authors()
+        self.stdout.write(f'Авторов в рейтинге: {len(authors)}')
+        self.stdout.write(self.style.SUCCESS('Рейтинги обновлены.'))
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm;',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_upper_like '
+    'ON recipes_ingredient (UPPER(name) varchar_pattern_ops);',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_upper_trgm '
+    'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops);',
+)
+POSTGRES_BACKWARD = (
+    'DROP INDEX IF EXISTS recipes_ingredient_name_upper_trgm;',
+    'DROP INDEX IF EXISTS recipes_ingredient_name_upper_like;',
+)
+
+
+def run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Индексы для istartswith/icontains по названию Ингредиента.
+
+    Django строит эти фильтры как UPPER(name) LIKE UPPER(...), поэтому
+    индексы построены по UPPER(name). В SQLite миграция ничего не делает.
+    """
+
+    dependencies = [
+        ('recipes', '0003_shoppingcartingredient'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgres(POSTGRES_FORWARD),
+            run_on_postgres(POSTGRES_BACKWARD),
+        ),
+    ]
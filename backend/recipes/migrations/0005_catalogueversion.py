@@ -0,0 +1,37 @@
+# Generated by Django 4.2.3 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+def create_catalogue_versions(apps, schema_editor):
+    CatalogueVersion = apps.get_model('recipes', 'CatalogueVersion')
+    CatalogueVersion.objects.bulk_create(
+        CatalogueVersion(name=name, version=1)
+        for name in ('tags', 'ingredients')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_ingredient_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Справочник')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия справочника',
+                'verbose_name_plural': 'Версии справочников',
+            },
+        ),
+        migrations.RunPython(
+            create_catalogue_versions, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.3 on 2026-10-17 06:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    for model_name in ('FavoriteRecipe', 'ShoppingCart'):
+        model = apps.get_model('recipes', model_name)
+        duplicates = model.objects.values('user', 'recipe').annotate(
+            first_id=Min('id'), total=Count('id')
+        ).filter(total__gt=1).order_by()
+        for item in duplicates:
+            model.objects.filter(
+                user=item['user'], recipe=item['recipe']
+            ).exclude(id=item['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='favoriterecipe',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favoriterecipe_user_recipe'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shoppingcart_user_recipe'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-17 06:23
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=recipes.storage.get_recipe_storage, upload_to='static/recipe/', verbose_name='Изображение рецепта'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations
+
+FORWARD = {
+    'postgresql': (
+        'ALTER TABLE recipes_recipe '
+        'ADD COLUMN IF NOT EXISTS search_vector tsvector;',
+        'CREATE INDEX IF NOT EXISTS recipes_recipe_search_vector_gin '
+        'ON recipes_recipe USING gin (search_vector);',
+    ),
+    'sqlite': (
+        'CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5('
+        "name, text, ingredients, tokenize='unicode61 remove_diacritics 2');",
+    ),
+}
+# Заполнение зафиксировано здесь, чтобы миграция не зависела от
+# будущих изменений recipes.fulltext.
+BACKFILL = {
+    'postgresql': (
+        'UPDATE recipes_recipe r SET search_vector = '
+        "setweight(to_tsvector('russian', coalesce(r.name, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(r.text, '')), 'B') || "
+        "setweight(to_tsvector('russian', coalesce(("
+        "SELECT string_agg(i.name, ' ') FROM recipes_recipeingredient ri "
+        'JOIN recipes_ingredient i ON i.id = ri.ingredient_id '
+        "WHERE ri.recipe_id = r.id), '')), 'C');"
+    ),
+    'sqlite': (
+        'INSERT INTO recipes_recipe_fts (rowid, name, text, ingredients) '
+        'SELECT r.id, r.name, r.text, ('
+        "SELECT group_concat(i.name, ' ') FROM recipes_recipeingredient ri "
+        'JOIN recipes_ingredient i ON i.id = ri.ingredient_id '
+        'WHERE ri.recipe_id = r.id) FROM recipes_recipe r;'
+    ),
+}
+BACKWARD = {
+    'postgresql': (
+        'DROP INDEX IF EXISTS recipes_recipe_search_vector_gin;',
+        'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector;',
+    ),
+    'sqlite': (
+        'DROP TABLE IF EXISTS recipes_recipe_fts;',
+    ),
+}
+
+
+def create_search_index(apps, schema_editor):
+    for statement in FORWARD.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+    backfill = BACKFILL.get(schema_editor.connection.vendor)
+    if backfill:
+        schema_editor.execute(backfill)
+
+
+def drop_search_index(apps, schema_editor):
+    for statement in BACKWARD.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовый индекс Рецептов.
+
+    Столбец search_vector и FTS5-таблица не описаны в модели: с ними
+    работает только модуль recipes.fulltext, а после изменения формата
+    документа их перестраивает команда rebuild_recipe_search.
+    """
+
+    dependencies = [
+        ('recipes', '0009_recipe_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.3 on 2026-10-17 06:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0012_recipe_favorites_count'),
+    ]
+
+    operations = [
+        # Без значения по умолчанию: иначе всем прежним записям достанется
+        # время миграции, и они попадут в рейтинг текущей недели.
+        migrations.AddField(
+            model_name='favoriterecipe',
+            name='added_at',
+            field=models.DateTimeField(db_index=True, help_text='Не задана для записей, добавленных до её появления.', null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='added_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Не задана для записей, добавленных до её появления.', null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.CreateModel(
+            name='IngredientStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipes_count', models.PositiveIntegerField(verbose_name='Рецептов')),
+                ('rank', models.PositiveIntegerField(db_index=True, verbose_name='Место')),
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stat', to='recipes.ingredient', verbose_name='Ингредиент')),
+            ],
+            options={
+                'verbose_name': 'Популярность ингредиента',
+                'verbose_name_plural': 'Популярные ингредиенты',
+                'ordering': ('rank',),
+            },
+        ),
+        migrations.CreateModel(
+            name='AuthorStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('followers_count', models.PositiveIntegerField(verbose_name='Подписчиков')),
+                ('recipes_count', models.PositiveIntegerField(verbose_name='Рецептов')),
+                ('rank', models.PositiveIntegerField(db_index=True, verbose_name='Место')),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stat', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Популярность автора',
+                'verbose_name_plural': 'Популярные авторы',
+                'ordering': ('rank',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeWeekStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(verbose_name='Неделя')),
+                ('favorites_count', models.PositiveIntegerField(verbose_name='Добавлений в избранное')),
+                ('rank', models.PositiveIntegerField(verbose_name='Место')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='week_stats', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Популярность рецепта за неделю',
+                'verbose_name_plural': 'Популярные рецепты недели',
+                'ordering': ('-week', 'rank'),
+                'indexes': [models.Index(fields=['week', 'rank'], name='recipe_week_stat_rank_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipeweekstat',
+            constraint=models.UniqueConstraint(fields=('recipe', 'week'), name='unique_recipe_week_stat'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_recipes_count(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    Ingredient.objects.update(recipes_count=Coalesce(Subquery(
+        RecipeIngredient.objects.filter(
+            ingredient=OuterRef('pk')
+        ).order_by().values('ingredient').annotate(
+            count=Count('*')
+        ).values('count')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_popularity_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(
+            fill_recipes_count, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-17 07:08
+
+from django.db import migrations, models
+import django.db.models.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_ingredient_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['image'], name='recipe_image_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(django.db.models.fields.json.KeyTransform('webp', 'image_variants'), name='recipe_image_webp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(django.db.models.fields.json.KeyTransform('thumbnail', 'image_variants'), name='recipe_image_thumbnail_idx'),
+        ),
+    ]
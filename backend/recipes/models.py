@@ -1,11 +1,56 @@
+from collections import Counter, defaultdict
+
 from django.core import validators
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Exists, F, OuterRef, Sum
+from django.db.models.fields.json import KeyTransform
+from django.utils import timezone
 from colorfield.fields import ColorField
 
 from users.models import User
+from .storage import get_recipe_storage
 from foodgram.constant import (MAX_LENGTH_CHAR_FIELD, COLOR_PALETTE,
                                MIN_VALUE_TIME, MAX_VALUE_TIME,
-                               MIN_VALUE_AMOUNT, MAX_VALUE_AMOUNT,)
+                               MIN_VALUE_AMOUNT, MAX_VALUE_AMOUNT,
+                               IMAGE_DIR)
+
+
+class CatalogueVersionManager(models.Manager):
+    """Менеджер версий справочников."""
+
+    def get_version(self, name):
+        """Текущая версия справочника и время её изменения."""
+        return self.filter(name=name).values_list(
+            'version', 'updated_at'
+        ).first() or (0, None)
+
+    def bump(self, name):
+        """Увеличить версию справочника после изменения данных."""
+        if not self.filter(name=name).update(
+            version=F('version') + 1, updated_at=timezone.now()
+        ):
+            self.get_or_create(name=name, defaults={'version': 1})
+
+
+class CatalogueVersion(models.Model):
+    """Модель версий справочников Тэгов и Ингредиентов."""
+
+    name = models.CharField(
+        'Справочник',
+        max_length=MAX_LENGTH_CHAR_FIELD,
+        unique=True,
+    )
+    version = models.PositiveBigIntegerField('Версия', default=0)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = CatalogueVersionManager()
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
 
 
 class Ingredient(models.Model):
@@ -19,6 +64,11 @@ class Ingredient(models.Model):
         'Единица измерения',
         max_length=MAX_LENGTH_CHAR_FIELD,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('name',)
@@ -77,10 +127,17 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         'Изображение рецепта',
-        upload_to='static/recipe/',
+        upload_to=IMAGE_DIR,
+        storage=get_recipe_storage,
         blank=True,
         null=True,
     )
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         'Описание рецепта',
     )
@@ -107,16 +164,61 @@ class Recipe(models.Model):
         ),
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(fields=('image',), name='recipe_image_idx'),
+            models.Index(
+                KeyTransform('webp', 'image_variants'),
+                name='recipe_image_webp_idx',
+            ),
+            models.Index(
+                KeyTransform('thumbnail', 'image_variants'),
+                name='recipe_image_thumbnail_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.author.email}, {self.name}'
 
 
+class RecipeIngredientManager(models.Manager):
+    """Менеджер связей Рецептов и Ингредиентов.
+
+    bulk_create не отправляет сигналы, поэтому счётчики рецептов у
+    Ингредиентов для массовой вставки увеличиваются здесь.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        ingredients = defaultdict(list)
+        for ingredient_id, count in Counter(
+            obj.ingredient_id for obj in objs
+        ).items():
+            ingredients[count].append(ingredient_id)
+        for count, ingredient_ids in ingredients.items():
+            Ingredient.objects.filter(pk__in=ingredient_ids).update(
+                recipes_count=F('recipes_count') + count
+            )
+        return objs
+
+
 class RecipeIngredient(models.Model):
     """Модель связи моделей Рецептов и ингредиентов."""
 
@@ -147,6 +249,8 @@ class RecipeIngredient(models.Model):
         verbose_name='Количество',
     )
 
+    objects = RecipeIngredientManager()
+
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Количество ингредиентов'
@@ -157,6 +261,64 @@ class RecipeIngredient(models.Model):
                 name='unique_ingredient'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('ingredient', 'recipe'),
+                name='recipeingredient_ingr_recipe',
+            ),
+        )
+
+
+POSTGRES_INSERT_RELATIONS = (
+    'INSERT INTO {table} ({columns}) VALUES {rows} '
+    'ON CONFLICT DO NOTHING RETURNING {recipe}'
+)
+
+
+class UserRecipeRelationManager(models.Manager):
+    """Менеджер связей пользователя с Рецептами."""
+
+    def insert_returning(self, objs):
+        fields = [
+            field for field in self.model._meta.local_concrete_fields
+            if not field.primary_key
+        ]
+        row = '({})'.format(', '.join(('%s',) * len(fields)))
+        sql = POSTGRES_INSERT_RELATIONS.format(
+            table=connection.ops.quote_name(self.model._meta.db_table),
+            columns=', '.join(
+                connection.ops.quote_name(field.column) for field in fields
+            ),
+            rows=', '.join((row,) * len(objs)),
+            recipe=connection.ops.quote_name(
+                self.model._meta.get_field('recipe').column
+            ),
+        )
+        params = [
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for obj in objs
+            for field in fields
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {recipe_id for recipe_id, in cursor.fetchall()}
+
+    def add(self, user, recipe_ids):
+        """Добавить Рецепты пользователю.
+
+        Возвращает идентификаторы Рецептов, которые добавил именно этот
+        вызов, а не параллельный запрос.
+        """
+        objs = [self.model(user=user, recipe_id=pk) for pk in recipe_ids]
+        if not objs:
+            return set()
+        if connection.vendor == 'postgresql':
+            return self.insert_returning(objs)
+        with transaction.atomic():
+            stored = self.filter(user=user, recipe_id__in=recipe_ids)
+            existing = set(stored.values_list('recipe_id', flat=True))
+            self.bulk_create(objs, ignore_conflicts=True)
+            return set(stored.values_list('recipe_id', flat=True)) - existing
 
 
 class UserRecipeRelation(models.Model):
@@ -174,9 +336,17 @@ class UserRecipeRelation(models.Model):
         verbose_name='Рецепт',
     )
 
+    objects = UserRecipeRelationManager()
+
     class Meta:
         abstract = True
         ordering = ('user',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_%(class)s_user_recipe'
+            ),
+        )
 
     def __str__(self):
         return (f'Пользователь {self.user} добавил'
@@ -187,6 +357,14 @@ class UserRecipeRelation(models.Model):
 class FavoriteRecipe(UserRecipeRelation):
     """Модель избранных рецептов пользователя."""
 
+    added_at = models.DateTimeField(
+        'Дата добавления',
+        null=True,
+        default=timezone.now,
+        db_index=True,
+        help_text='Не задана для записей, добавленных до её появления.',
+    )
+
     class Meta(UserRecipeRelation.Meta):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
@@ -206,3 +384,160 @@ class ShoppingCart(UserRecipeRelation):
 
     def __str__(self):
         return super().__str__() + ' в покупки.'
+
+
+class ShoppingCartIngredientManager(models.Manager):
+    """Менеджер пересчёта суммарного Списка покупок."""
+
+    def refresh(self, users, recipes=None, ingredients=None):
+        """Пересчитать Список покупок пользователей.
+
+        Если переданы рецепты или ингредиенты, пересчитываются только
+        затронутые ими строки. Суммы записываются через upsert, а строки
+        с обнулившимся количеством удаляются отдельно, поэтому
+        параллельные пересчёты не нарушают уникальность пар
+        пользователь-ингредиент.
+        """
+        amounts = RecipeIngredient.objects.filter(
+            recipe__shopping_cart__user__in=users
+        )
+        stored = self.filter(user__in=users)
+        if recipes is not None:
+            ingredients = RecipeIngredient.objects.filter(
+                recipe__in=recipes
+            ).values('ingredient')
+        if ingredients is not None:
+            amounts = amounts.filter(ingredient__in=ingredients)
+            stored = stored.filter(ingredient__in=ingredients)
+        amounts = amounts.values(
+            'recipe__shopping_cart__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by()
+        with transaction.atomic():
+            self.bulk_create(
+                (
+                    self.model(
+                        user_id=item['recipe__shopping_cart__user'],
+                        ingredient_id=item['ingredient'],
+                        amount=item['total'],
+                    )
+                    for item in amounts
+                ),
+                update_conflicts=True,
+                unique_fields=('user', 'ingredient'),
+                update_fields=('amount',),
+            )
+            stored.exclude(Exists(RecipeIngredient.objects.filter(
+                ingredient=OuterRef('ingredient'),
+                recipe__shopping_cart__user=OuterRef('user'),
+            ))).delete()
+
+
+class ShoppingCartIngredient(models.Model):
+    """Модель суммарного количества Ингредиентов в Корзине пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField('Количество')
+
+    objects = ShoppingCartIngredientManager()
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Список покупок'
+        ordering = ('user',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_cart_ingredient'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} - {self.amount}'
+
+
+class IngredientStat(models.Model):
+    """Место Ингредиента в рейтинге по числу Рецептов."""
+
+    ingredient = models.OneToOneField(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='stat',
+        verbose_name='Ингредиент',
+    )
+    recipes_count = models.PositiveIntegerField('Рецептов')
+    rank = models.PositiveIntegerField('Место', db_index=True)
+
+    class Meta:
+        verbose_name = 'Популярность ингредиента'
+        verbose_name_plural = 'Популярные ингредиенты'
+        ordering = ('rank',)
+
+    def __str__(self):
+        return f'{self.rank}. {self.ingredient.name}'
+
+
+class RecipeWeekStat(models.Model):
+    """Место Рецепта в рейтинге добавлений в Избранное за неделю."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='week_stats',
+        verbose_name='Рецепт',
+    )
+    week = models.DateField('Неделя')
+    favorites_count = models.PositiveIntegerField('Добавлений в избранное')
+    rank = models.PositiveIntegerField('Место')
+
+    class Meta:
+        verbose_name = 'Популярность рецепта за неделю'
+        verbose_name_plural = 'Популярные рецепты недели'
+        ordering = ('-week', 'rank')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'week'),
+                name='unique_recipe_week_stat'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('week', 'rank'),
+                name='recipe_week_stat_rank_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.week}: {self.rank}. {self.recipe.name}'
+
+
+class AuthorStat(models.Model):
+    """Место автора в рейтинге по числу подписчиков."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stat',
+        verbose_name='Автор',
+    )
+    followers_count = models.PositiveIntegerField('Подписчиков')
+    recipes_count = models.PositiveIntegerField('Рецептов')
+    rank = models.PositiveIntegerField('Место', db_index=True)
+
+    class Meta:
+        verbose_name = 'Популярность автора'
+        verbose_name_plural = 'Популярные авторы'
+        ordering = ('rank',)
+
+    def __str__(self):
+        return f'{self.rank}. {self.author.username}'
@@ -0,0 +1,98 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import User
+from foodgram.constant import CATALOGUE_INGREDIENTS, CATALOGUE_TAGS
+from .fulltext import refresh_recipe_search
+from .models import (CatalogueVersion, FavoriteRecipe, Ingredient, Recipe,
+                     RecipeIngredient, Tag)
+from .storage import release_recipe_image
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(**kwargs):
+    CatalogueVersion.objects.bump(CATALOGUE_TAGS)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients_version(**kwargs):
+    CatalogueVersion.objects.bump(CATALOGUE_INGREDIENTS)
+
+
+@receiver(post_save, sender=Ingredient)
+def refresh_ingredient_recipes_search(instance, created, **kwargs):
+    if not created:
+        refresh_recipe_search(RecipeIngredient.objects.filter(
+            ingredient=instance
+        ).values_list('recipe', flat=True))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_recipe_image(instance, **kwargs):
+    release_recipe_image(instance.image.name, instance.image_variants)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_deleted_recipe_search(instance, **kwargs):
+    refresh_recipe_search((instance.pk,))
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    User.objects.filter(
+        pk=instance.author_id, recipes_count__gt=0
+    ).update(recipes_count=F('recipes_count') - 1)
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1
+        )
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+def decrement_favorites_count(instance, **kwargs):
+    Recipe.objects.filter(
+        pk=instance.recipe_id, favorites_count__gt=0
+    ).update(favorites_count=F('favorites_count') - 1)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_previous_ingredient(instance, raw=False, **kwargs):
+    instance.previous_ingredient_id = None
+    if not raw and not instance._state.adding:
+        instance.previous_ingredient_id = RecipeIngredient.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient', flat=True).first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def increment_ingredient_recipes_count(instance, created, **kwargs):
+    previous = getattr(instance, 'previous_ingredient_id', None)
+    if not created and previous in (None, instance.ingredient_id):
+        return
+    Ingredient.objects.filter(pk=instance.ingredient_id).update(
+        recipes_count=F('recipes_count') + 1
+    )
+    if previous is not None:
+        Ingredient.objects.filter(
+            pk=previous, recipes_count__gt=0
+        ).update(recipes_count=F('recipes_count') - 1)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def decrement_ingredient_recipes_count(instance, **kwargs):
+    Ingredient.objects.filter(
+        pk=instance.ingredient_id, recipes_count__gt=0
+    ).update(recipes_count=F('recipes_count') - 1)
@@ -0,0 +1,95 @@
+"""Сводные таблицы популярности.
+
+Таблицы пересчитываются командой rollup_stats и хранят только первые
+STATS_TOP_SIZE мест, поэтому чтение рейтинга — выборка по индексу.
+Рейтинги Ингредиентов и авторов строятся по хранимым счётчикам, а
+недельный рейтинг Рецептов — по избранному одной недели.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from users.models import User
+from .models import (AuthorStat, FavoriteRecipe, Ingredient,
+                     IngredientStat, RecipeWeekStat)
+from foodgram.constant import STATS_TOP_SIZE
+
+
+def get_week(day=None):
+    """Понедельник недели, в которую входит день."""
+
+    day = day or timezone.localdate()
+    return day - timedelta(days=day.weekday())
+
+
+@transaction.atomic
+def rollup_ingredients():
+    """Рейтинг Ингредиентов по хранимому счётчику рецептов.
+
+    Счётчик обновляется при записи связей Рецептов и Ингредиентов,
+    поэтому пересчёт читает только первые места, а не все связи.
+    """
+
+    ingredients = Ingredient.objects.filter(
+        recipes_count__gt=0
+    ).order_by('-recipes_count', 'id').values_list(
+        'id', 'recipes_count'
+    )[:STATS_TOP_SIZE]
+    IngredientStat.objects.all().delete()
+    return IngredientStat.objects.bulk_create(
+        IngredientStat(
+            ingredient_id=ingredient_id,
+            recipes_count=recipes_count,
+            rank=rank,
+        )
+        for rank, (ingredient_id, recipes_count)
+        in enumerate(ingredients, start=1)
+    )
+
+
+@transaction.atomic
+def rollup_recipe_week(week):
+    """Рейтинг Рецептов по добавлениям в избранное за неделю.
+
+    Избранное без даты добавления в недельные рейтинги не входит.
+    """
+
+    start = timezone.make_aware(datetime.combine(week, time.min))
+    rows = FavoriteRecipe.objects.filter(
+        added_at__gte=start,
+        added_at__lt=start + timedelta(days=7),
+    ).order_by().values('recipe').annotate(
+        favorites_count=Count('*')
+    ).order_by('-favorites_count', 'recipe')[:STATS_TOP_SIZE]
+    RecipeWeekStat.objects.filter(week=week).delete()
+    return RecipeWeekStat.objects.bulk_create(
+        RecipeWeekStat(
+            recipe_id=row['recipe'],
+            week=week,
+            favorites_count=row['favorites_count'],
+            rank=rank,
+        )
+        for rank, row in enumerate(rows, start=1)
+    )
+
+
+@transaction.atomic
+def rollup_authors():
+    authors = User.objects.filter(
+        followers_count__gt=0
+    ).order_by('-followers_count', 'id').values_list(
+        'id', 'followers_count', 'recipes_count'
+    )[:STATS_TOP_SIZE]
+    AuthorStat.objects.all().delete()
+    return AuthorStat.objects.bulk_create(
+        AuthorStat(
+            author_id=author_id,
+            followers_count=followers_count,
+            recipes_count=recipes_count,
+            rank=rank,
+        )
+        for rank, (author_id, followers_count, recipes_count)
+        in enumerate(authors, start=1)
+    )
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from foodgram.constant import MEDIA_GC_MIN_AGE
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором файл называется по хешу своего содержимого.
+
+    Одинаковые загрузки попадают в один и тот же файл и не записываются
+    повторно: у существующего файла только обновляется время изменения,
+    чтобы его не удалил одновременный release_files.
+    """
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.get_content_name(name, content)
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length)
+        return name
+
+
+recipe_storage = ContentAddressedStorage()
+
+
+def get_recipe_storage():
+    return recipe_storage
+
+
+def is_referenced(name):
+    from .models import Recipe
+
+    return Recipe.objects.filter(
+        Q(image=name)
+        | Q(image_variants__webp=name)
+        | Q(image_variants__thumbnail=name)
+    ).exists()
+
+
+def is_recent(name):
+    threshold = timezone.now() - timedelta(seconds=MEDIA_GC_MIN_AGE)
+    try:
+        return recipe_storage.get_modified_time(name) > threshold
+    except FileNotFoundError:
+        return True
+
+
+def release_files(names):
+    """Удалить файлы, на которые больше не ссылается ни один Рецепт.
+
+    Файлы моложе MEDIA_GC_MIN_AGE не трогаются: их могла только что
+    загрузить другая запись с тем же содержимым. Такие файлы позже
+    удалит collect_media_garbage.
+    """
+
+    for name in names:
+        if name and not is_referenced(name) and not is_recent(name):
+            recipe_storage.delete(name)
+
+
+def release_recipe_image(image_name, variants):
+    """Освободить изображение Рецепта и его варианты после коммита."""
+
+    names = [image_name, *(variants or {}).values()]
+    transaction.on_commit(lambda: release_files(names))
@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import User
+from foodgram.constant import QUERY_PLAN_MIN_ROWS
+
+ROW_COUNTS = (2, 10)
+AUTHORS_COUNT = 20
+
+
+class RecipeAdminQueriesTest(TestCase):
+    """Список Рецептов в админке: постоянное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com', username='admin',
+            first_name='Админ', last_name='Сайта', password='Pa55word!',
+        )
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тэг {number}', color=f'#00000{number}',
+                slug=f'tag_{number}')
+            for number in range(2)
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(3)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_recipes(self, count):
+        for number in range(Recipe.objects.count(), count):
+            author = User.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}', first_name='Автор',
+                last_name=str(number), password='Pa55word!',
+            )
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png',
+            )
+            recipe.tags.set(self.tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=1)
+                for ingredient in self.ingredients
+            )
+
+    def test_changelist_queries(self):
+        for count in ROW_COUNTS:
+            self.create_recipes(count)
+            with self.subTest(rows=count):
+                with self.assertNumQueries(8):
+                    response = self.client.get('/admin/recipes/recipe/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.context['cl'].result_count, count
+                )
+
+
+class QueryPlansTest(TestCase):
+    """Фильтры списка Рецептов не приводят к полному сканированию."""
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = User.objects.bulk_create(
+            User(email=f'author{number}@example.com',
+                 username=f'author{number}', first_name='Автор',
+                 last_name=str(number))
+            for number in range(AUTHORS_COUNT)
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тэг {number}', color=f'#00000{number}',
+                slug=f'tag_{number}')
+            for number in range(5)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(author=authors[number % AUTHORS_COUNT],
+                   name=f'Рецепт {number}', text='Текст', cooking_time=10,
+                   image='recipes/images/recipe.png')
+            for number in range(QUERY_PLAN_MIN_ROWS)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tags[number % len(tags)])
+            for number, recipe in enumerate(recipes)
+        )
+        for model, step in ((FavoriteRecipe, 7), (ShoppingCart, 11)):
+            model.objects.bulk_create(
+                model(user=author, recipe=recipe)
+                for author in authors
+                for recipe in recipes[author.pk % step::step * 5]
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_recipe_filters_use_indexes(self):
+        output = StringIO()
+        call_command('check_query_plans', stdout=output)
+        self.assertIn('Большие таблицы читаются по индексам.',
+                      output.getvalue())
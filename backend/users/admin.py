@@ -39,13 +39,15 @@ class FoodgramUserAdmin(UserAdmin):
             obj.set_password(form.cleaned_data['password'])
         super().save_model(request, obj, form, change)
 
-    @admin.display(description='Количество рецептов')
+    @admin.display(description='Количество рецептов',
+                   ordering='recipes_count')
     def get_recipe_count(self, obj):
-        return obj.recipe.count()
+        return obj.recipes_count
 
-    @admin.display(description='Количество подписчиков')
+    @admin.display(description='Количество подписчиков',
+                   ordering='followers_count')
     def get_follower_count(self, obj):
-        return obj.follower.count()
+        return obj.followers_count
 
 
 @admin.register(Subscribe)
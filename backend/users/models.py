@@ -37,6 +37,16 @@ class User(AbstractUser):
         validators=[validators.validate_password],
         help_text=('Пароль должен соответствовать требованиям безопасности.'),
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -0,0 +1,20 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Subscribe, User
+
+
+@receiver(post_save, sender=Subscribe)
+def increment_followers_count(instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            followers_count=F('followers_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Subscribe)
+def decrement_followers_count(instance, **kwargs):
+    User.objects.filter(
+        pk=instance.author_id, followers_count__gt=0
+    ).update(followers_count=F('followers_count') - 1)
@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+from recipes.models import Recipe
+from users.models import Subscribe, User
+
+ROW_COUNTS = (2, 10)
+
+
+class UserAdminQueriesTest(TestCase):
+    """Список Пользователей в админке: постоянное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com', username='admin',
+            first_name='Админ', last_name='Сайта', password='Pa55word!',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_users(self, count):
+        for number in range(User.objects.count(), count):
+            user = User.objects.create_user(
+                email=f'user{number}@example.com',
+                username=f'user{number}', first_name='Пользователь',
+                last_name=str(number), password='Pa55word!',
+            )
+            Recipe.objects.create(
+                author=user, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png',
+            )
+            Subscribe.objects.create(user=self.admin, author=user)
+
+    def test_changelist_queries(self):
+        for count in ROW_COUNTS:
+            self.create_users(count)
+            with self.subTest(rows=count):
+                with self.assertNumQueries(7):
+                    response = self.client.get('/admin/users/user/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.context['cl'].result_count, count
+                )